@@ -0,0 +1,37 @@
+from datetime import datetime, timedelta
+
+from recurrence import complete_fields
+
+# Task transitions shared by the window (main.py) and the headless front ends
+# (cli.py, api.py). Callers reschedule reminders themselves if they run any.
+
+def add(db, task, now=None):
+    """Stores a new task and counts it in the statistics; returns the stored task."""
+    now = now or datetime.now()
+    if task.created is None:
+        task.created = now.replace(microsecond=0)
+    task = db.add_task(task)
+    db.tally("add", task, now)
+    return task
+
+def complete(db, task, now=None):
+    """Completes a task (a series moves on to its next occurrence); the tally also
+    updates the total and the streak (see stats.count_completion)."""
+    now = now or datetime.now()
+    db.tally("complete", task, now)
+    fields = complete_fields(task, now) if task.repeat else {"status": "Completed"}
+    db.update_task(task, **fields)
+
+def snooze(db, task, minutes, now=None):
+    """Pushes the due date back by 'minutes' and resets the reminder. A series
+    remembers the occurrence's own time, so later occurrences don't move."""
+    fields = {"due": task.due + timedelta(minutes=minutes), "last_reminded": None}
+    if task.repeat and task.slot is None:
+        fields["slot"] = task.due
+    db.update_task(task, **fields)
+    db.tally("snooze", task, now)
+
+def delete(db, task, now=None):
+    """Soft-deletes a task; it stays in the history."""
+    db.tally("delete", task, now)
+    db.update_task(task, status="Deleted")
@@ -0,0 +1,167 @@
+import importlib.util
+import queue
+import sys
+import threading
+import time
+
+import perf
+
+COALESCE_WINDOW = 0.5  # Seconds the dispatcher waits for more due tasks before alerting
+SUMMARY_LINES = 5      # Task titles listed in a summary notification
+MAX_FAILURES = 3       # Consecutive errors before a backend is switched off
+# Minimum seconds between alerts for tasks of each priority; tasks that come
+# due sooner are held and go into the next summary for their priority
+RATE_LIMITS = {"High": 0, "Normal": 30, "Low": 120}
+
+# --- BACKENDS ---
+# A sound backend has play(kind) with kind "alert" or "success"; a notify
+# backend has notify(title, message). Both may block: they only ever run on
+# the dispatcher thread.
+
+class WinsoundBackend:
+    name = "winsound"
+
+    def __init__(self):
+        import winsound
+        self.winsound = winsound
+
+    def play(self, kind):
+        self.winsound.Beep(2000 if kind == "success" else 1000, 300)
+
+class BellBackend:
+    """Terminal bell; used where winsound doesn't exist."""
+    name = "bell"
+
+    def play(self, kind):
+        sys.stdout.write("\a")
+        sys.stdout.flush()
+
+class PlyerBackend:
+    """plyer is only imported when the first notification is sent."""
+    name = "plyer"
+
+    def notify(self, title, message):
+        from plyer import notification
+        notification.notify(title=title, message=message, timeout=5)
+
+def default_sound():
+    """winsound on Windows, otherwise the terminal bell when there is a terminal, else None."""
+    try:
+        return WinsoundBackend()
+    except ImportError:
+        return BellBackend() if sys.stdout is not None and sys.stdout.isatty() else None
+
+def default_notify():
+    """plyer desktop notifications if installed, else None."""
+    return PlyerBackend() if importlib.util.find_spec("plyer") else None
+
+class Dispatcher:
+    """Worker thread that turns due tasks into alerts.
+
+    The scheduler only queues work here and never waits on a backend.
+    Tasks that come due within COALESCE_WINDOW of each other produce one
+    summary notification and one sound, RATE_LIMITS spaces out alerts per
+    priority, and a backend that keeps failing is switched off.
+    """
+
+    def __init__(self, sound=None, notify=None):
+        self.backends = {"sound": sound if sound is not None else default_sound(),
+                         "notify": notify if notify is not None else default_notify()}
+        self.failures = {"sound": 0, "notify": 0}
+        self.queue = queue.Queue()
+        self.held = {}       # task id -> task waiting for its priority's rate limit
+        self.last_alert = {} # priority -> time.monotonic() of its last alert
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def submit(self, tasks):
+        """Queues due tasks for alerting."""
+        self.queue.put(("due", list(tasks)))
+
+    def sound(self, kind):
+        """Queues a sound (e.g. 'success' when a task is completed)."""
+        self.queue.put(("sound", kind))
+
+    def stop(self):
+        self.queue.put(None)
+
+    def run(self):
+        while True:
+            try:
+                item = self.queue.get(timeout=self._next_release())
+            except queue.Empty:
+                self._alert()
+                continue
+            if item is None:
+                return
+            kind, payload = item
+            if kind == "sound":
+                self._call("sound", "play", payload)
+                continue
+
+            # Gather everything else that comes due in the window into one alert
+            for t in payload:
+                self.held[t.id] = t
+            deadline = time.monotonic() + COALESCE_WINDOW
+            while True:
+                try:
+                    item = self.queue.get(timeout=max(0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    return
+                if item[0] == "sound":
+                    self._call("sound", "play", item[1])
+                else:
+                    for t in item[1]:
+                        self.held[t.id] = t
+            self._alert()
+
+    def _ready(self, priority, now):
+        return now - self.last_alert.get(priority, float("-inf")) >= RATE_LIMITS.get(priority, 0)
+
+    def _next_release(self):
+        """Seconds until a held task's priority may alert again, or None to wait for work."""
+        if not self.held:
+            return None
+        now = time.monotonic()
+        waits = [self.last_alert.get(p, now) + RATE_LIMITS.get(p, 0) - now
+                 for p in {t.priority for t in self.held.values()}]
+        return max(0, min(waits))
+
+    def _alert(self):
+        """Sends one notification for every held task whose priority isn't rate-limited."""
+        now = time.monotonic()
+        ready = [t for t in self.held.values() if self._ready(t.priority, now)]
+        if not ready:
+            return
+        for t in ready:
+            del self.held[t.id]
+            self.last_alert[t.priority] = now
+
+        with perf.Timer("alert"):
+            if len(ready) == 1:
+                title, message = f"Due: {ready[0].task}", "Task is due!"
+            else:
+                title = f"{len(ready)} tasks due"
+                ready.sort(key=lambda t: (t.priority != "High", t.sort_key))
+                lines = [t.task for t in ready[:SUMMARY_LINES]]
+                if len(ready) > SUMMARY_LINES:
+                    lines.append(f"... and {len(ready) - SUMMARY_LINES} more")
+                message = "\n".join(lines)
+            self._call("notify", "notify", title, message)
+            self._call("sound", "play", "alert")
+
+    def _call(self, slot, method, *args):
+        """Runs a backend call, switching the backend off after MAX_FAILURES errors in a row."""
+        backend = self.backends[slot]
+        if backend is None:
+            return
+        try:
+            getattr(backend, method)(*args)
+            self.failures[slot] = 0
+        except Exception as e:
+            self.failures[slot] += 1
+            if self.failures[slot] >= MAX_FAILURES:
+                print(f"Disabling {backend.name} {slot} backend: {e}")
+                self.backends[slot] = None
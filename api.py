@@ -0,0 +1,301 @@
+import asyncio
+import http
+import json
+import threading
+import urllib.parse
+
+import actions
+from exporter import COLUMNS, DEFAULT_COLUMNS, iter_chunks
+from importer import STATUSES, parse_date, parse_row
+from recurrence import series_id
+
+PAGE_SIZE = 100    # Tasks per page unless the caller asks for another size
+MAX_PAGE = 5000    # Largest page a caller may ask for
+BATCH_CHUNK = 500  # Batch operations applied in one store transaction (and streamed back together)
+MAX_BODY = 64 * 1024 * 1024  # Largest request body the HTTP server reads
+
+def read_ops(lines):
+    """Parses JSON Lines of operations lazily; a bad line becomes a ValueError that run() reports."""
+    for line in lines:
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except ValueError as e:
+                yield ValueError(f"bad JSON: {e}")
+
+class Api:
+    """Store operations on plain JSON-ready dicts, shared by cli.py and the HTTP server.
+
+    Bad input raises ValueError and unknown ids LookupError; run() turns
+    both into {"ok": false, "error": ...} results. 'reminders' is this
+    process's ReminderSystem, if it runs one (other processes hear about
+    the changes through the store). Inside a batch, reminders are
+    rescheduled after the transaction ends: ReminderSystem takes its own
+    lock first and the store's second, so doing it the other way round
+    could deadlock.
+    """
+
+    OPS = ("add", "complete", "delete", "snooze", "get", "query", "stats")
+
+    def __init__(self, db, reminders=None):
+        self.db = db
+        self.reminders = reminders
+        self.local = threading.local()  # .deferred: tasks changed by the batch chunk this thread runs
+
+    def _task(self, task_id, pending=False):
+        """The stored task for an id (an upcoming occurrence's id names its series)."""
+        t = self.db.get_task(series_id(str(task_id)))
+        if t is None:
+            raise LookupError(f"no task with id '{task_id}'")
+        if pending and t.status != "Pending":
+            raise ValueError(f"task '{task_id}' is {t.status}")
+        return t
+
+    def _changed(self, t):
+        deferred = getattr(self.local, "deferred", None)
+        if deferred is not None:
+            deferred.append(t)
+        elif self.reminders is not None:
+            self.reminders.reschedule(t)
+        return {"ok": True, "task": t.to_dict()}
+
+    # --- OPERATIONS ---
+
+    def add(self, fields):
+        """Adds a task from saved-form fields (task, datetime, category, priority, repeat;
+        an 'id' must be new)."""
+        return self._changed(actions.add(self.db, parse_row(fields)))
+
+    def complete(self, id):
+        t = self._task(id, pending=True)
+        actions.complete(self.db, t)
+        return self._changed(t)
+
+    def delete(self, id):
+        t = self._task(id)
+        if t.status == "Deleted":
+            raise ValueError(f"task '{id}' is already deleted")
+        actions.delete(self.db, t)
+        return self._changed(t)
+
+    def snooze(self, id, minutes=10):
+        t = self._task(id, pending=True)
+        if not isinstance(minutes, int) or minutes <= 0:
+            raise ValueError(f"minutes must be a positive whole number, not {minutes!r}")
+        if t.due is None:
+            raise ValueError(f"task '{id}' has no valid due date")
+        actions.snooze(self.db, t, minutes)
+        return self._changed(t)
+
+    def get(self, id):
+        return {"ok": True, "task": self._task(id).to_dict()}
+
+    def query(self, view="active", category="All", priority="All", q="", offset=0, limit=PAGE_SIZE):
+        """One page of the active list (pending first, then by due date) or of the history.
+
+        'next' is the offset of the following page, or None on the last one.
+        Pages are sliced from the sorted list the store caches until its next
+        change (see search.ResultCache), so walking all of them costs one query.
+        """
+        offset, limit = int(offset), int(limit)
+        if offset < 0 or not 0 < limit <= MAX_PAGE:
+            raise ValueError(f"offset must be >= 0 and limit between 1 and {MAX_PAGE}")
+        if view == "active":
+            rows = self.db.active_tasks(category, priority, q)
+        elif view == "history":
+            rows = self.db.history_tasks(q)
+        else:
+            raise ValueError(f"unknown view '{view}' (active or history)")
+        page = rows[offset:offset + limit]
+        end = offset + len(page)
+        return {"ok": True, "total": len(rows), "offset": offset, "next": end if end < len(rows) else None,
+                "tasks": [t.to_dict() for t in page]}
+
+    def stats(self):
+        return {"ok": True, "stats": dict(self.db.user_stats), "totals": self.db.aggregates.totals()}
+
+    def run(self, op):
+        """Runs one operation such as {"op": "snooze", "id": "...", "minutes": 10}."""
+        try:
+            if isinstance(op, ValueError):
+                raise op
+            if not isinstance(op, dict) or op.get("op") not in self.OPS:
+                raise ValueError(f"unknown operation {op!r}")
+            args = dict(op)
+            name = args.pop("op")
+            if name == "add":
+                return self.add(args)
+            return getattr(self, name)(**args)
+        except TypeError as e:
+            return {"ok": False, "error": f"bad arguments: {e}"}
+        except (ValueError, LookupError) as e:
+            return {"ok": False, "error": str(e)}
+
+    def run_batch(self, ops):
+        """Runs operations in order, yielding a list of results every BATCH_CHUNK operations.
+
+        Each chunk is one store transaction, so a few thousand operations
+        cost a handful of disk writes. 'ops' may be a lazy iterator.
+        """
+        chunk = []
+        for op in ops:
+            chunk.append(op)
+            if len(chunk) == BATCH_CHUNK:
+                yield self._run_chunk(chunk)
+                chunk = []
+        if chunk:
+            yield self._run_chunk(chunk)
+
+    def _run_chunk(self, ops):
+        self.local.deferred = []
+        try:
+            with self.db.transaction():
+                results = [self.run(op) for op in ops]
+        finally:
+            changed, self.local.deferred = self.local.deferred, None
+        if self.reminders is not None:
+            self.reminders.reschedule_many(changed)
+        return results
+
+    def export(self, fmt="jsonl", columns=None, status=None, category=None, start=None, end=None):
+        """Checks the filters, then returns an iterator of CSV or JSON Lines text chunks.
+
+        status and category are comma-separated lists; start/end are dates
+        bounding the due date (end exclusive).
+        """
+        if fmt not in ("jsonl", "csv"):
+            raise ValueError(f"unknown format '{fmt}' (jsonl or csv)")
+        columns = columns.split(",") if columns else (list(COLUMNS) if fmt == "jsonl" else DEFAULT_COLUMNS)
+        unknown = [c for c in columns if c not in COLUMNS]
+        if unknown:
+            raise ValueError(f"unknown columns {unknown}; choose from {list(COLUMNS)}")
+        statuses = status.split(",") if status else None
+        if statuses and any(s not in STATUSES for s in statuses):
+            raise ValueError(f"status must be among {STATUSES}")
+        _, rows = self.db.export_query(statuses=statuses, categories=category.split(",") if category else None,
+                                       start=parse_date(start) if start else None,
+                                       end=parse_date(end) if end else None)
+        return (text for text, _ in iter_chunks(rows, columns, fmt))
+
+class Server:
+    """Small local HTTP/1.1 JSON server over an Api (asyncio, keep-alive, chunked streaming).
+
+    GET  /tasks?view=active|history&category=&priority=&q=&offset=&limit=
+    GET  /tasks/<id>
+    POST /tasks                          body: task fields, as for Api.add
+    POST /tasks/<id>/complete, /delete, /snooze (body {"minutes": 10})
+    POST /batch                          body: JSON array or JSON Lines of operations;
+                                         results stream back as JSON Lines
+    GET  /export?format=jsonl|csv&status=&category=&start=&end=&columns=
+    GET  /stats
+
+    Store calls run on worker threads, so a long export or batch doesn't
+    hold up other requests. There is no authentication: bind to localhost.
+    """
+
+    def __init__(self, api, host="127.0.0.1", port=8765):
+        self.api = api
+        self.host = host
+        self.port = port
+
+    async def serve(self):
+        server = await asyncio.start_server(self.handle, self.host, self.port)
+        print(f"Serving on http://{self.host}:{self.port}")
+        async with server:
+            await server.serve_forever()
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line.strip():
+                    break
+                method, target, _ = line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    h = await reader.readline()
+                    if not h.strip():
+                        break
+                    key, _, value = h.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY:
+                    await self.send(writer, 413, {"ok": False, "error": "request body too large"})
+                    break
+                body = await reader.readexactly(length) if length else b""
+                await self.respond(writer, method, target, body)
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass # Client went away or sent something that isn't HTTP
+        except asyncio.CancelledError:
+            pass # Server shutting down
+        finally:
+            writer.close()
+
+    async def respond(self, writer, method, target, body):
+        url = urllib.parse.urlsplit(target)
+        params = {k: v[-1] for k, v in urllib.parse.parse_qs(url.query).items()}
+        parts = [urllib.parse.unquote(p) for p in url.path.strip("/").split("/")]
+        try:
+            status, payload, content_type = await asyncio.to_thread(self.route, method, parts, params, body)
+        except LookupError as e:
+            status, payload, content_type = 404, {"ok": False, "error": str(e)}, None
+        except (ValueError, TypeError) as e:
+            status, payload, content_type = 400, {"ok": False, "error": str(e)}, None
+        except Exception as e:
+            print(f"API error on {method} {target}: {e}")
+            status, payload, content_type = 500, {"ok": False, "error": "internal error"}, None
+        await self.send(writer, status, payload, content_type)
+
+    def route(self, method, parts, params, body):
+        """Returns (status, dict or iterator of text chunks, content type of a stream)."""
+        api = self.api
+        if parts[0] == "tasks" and len(parts) == 1:
+            if method == "GET":
+                return 200, api.query(**params), None
+            if method == "POST":
+                return 201, api.add(json.loads(body or b"{}")), None
+        elif parts[0] == "tasks" and len(parts) == 2 and method == "GET":
+            return 200, api.get(parts[1]), None
+        elif parts[0] == "tasks" and len(parts) == 3 and method == "POST" and parts[2] in ("complete", "delete", "snooze"):
+            return 200, getattr(api, parts[2])(parts[1], **json.loads(body or b"{}")), None
+        elif parts == ["batch"] and method == "POST":
+            if body.lstrip().startswith(b"["):
+                ops = json.loads(body)
+            else:
+                ops = read_ops(body.decode("utf-8").splitlines())
+            chunks = ("".join(json.dumps(r) + "\n" for r in results) for results in api.run_batch(ops))
+            return 200, chunks, "application/x-ndjson"
+        elif parts == ["export"] and method == "GET":
+            fmt = params.pop("format", "jsonl")
+            return 200, api.export(fmt, **params), "text/csv" if fmt == "csv" else "application/x-ndjson"
+        elif parts == ["stats"] and method == "GET":
+            return 200, api.stats(), None
+        raise LookupError(f"no route for {method} {'/'.join(parts)}")
+
+    async def send(self, writer, status, payload, content_type=None):
+        head = f"HTTP/1.1 {status} {http.HTTPStatus(status).phrase}\r\n"
+        if isinstance(payload, dict):
+            data = json.dumps(payload).encode("utf-8")
+            writer.write(f"{head}Content-Type: application/json\r\nContent-Length: {len(data)}\r\n\r\n".encode() + data)
+            await writer.drain()
+            return
+
+        # Streams are produced on a worker thread one chunk at a time
+        writer.write(f"{head}Content-Type: {content_type}\r\nTransfer-Encoding: chunked\r\n\r\n".encode())
+        chunks = iter(payload)
+        while True:
+            try:
+                text = await asyncio.to_thread(next, chunks, None)
+            except Exception as e:
+                print(f"API error while streaming: {e}")
+                raise ConnectionError("stream aborted") # Ends the connection; the client sees a truncated body
+            if text is None:
+                break
+            if text:
+                data = text.encode("utf-8")
+                writer.write(b"%x\r\n%s\r\n" % (len(data), data))
+                await writer.drain()
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
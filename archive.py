@@ -0,0 +1,91 @@
+import glob
+import gzip
+import heapq
+import json
+import os
+import shutil
+from datetime import datetime, timedelta
+
+import perf
+from search import matches, tokenize
+from task import Task
+
+ARCHIVE_DIR = "task_archive"
+ARCHIVE_AFTER_DAYS = int(os.environ.get("TODO_ARCHIVE_DAYS", "30"))
+
+class Archiver:
+    """Moves old finished tasks out of the working set into monthly gzip segments.
+
+    Segments are task_archive/YYYY-MM.jsonl.gz, partitioned by due date, and
+    only ever appended to. Nothing in the archive is loaded at startup; the
+    history window pages through it newest first.
+    """
+
+    def __init__(self, directory=ARCHIVE_DIR, after_days=ARCHIVE_AFTER_DAYS):
+        self.directory = directory
+        self.after_days = after_days
+
+    def segment_path(self, month):
+        return os.path.join(self.directory, f"{month}.jsonl.gz")
+
+    @perf.timed("archive")
+    def run(self, db):
+        """Archives finished tasks due more than after_days ago. Returns how many moved."""
+        cutoff = datetime.now() - timedelta(days=self.after_days)
+        tasks = db.finished_before(cutoff)
+        if not tasks:
+            return 0
+
+        by_month = {}
+        for t in tasks:
+            by_month.setdefault(t.due.strftime("%Y-%m"), []).append(t)
+
+        # Write the archive first: a crash before remove_tasks leaves a duplicate
+        # (dropped when reading) instead of losing tasks.
+        os.makedirs(self.directory, exist_ok=True)
+        for month, month_tasks in by_month.items():
+            with open(self.segment_path(month), "ab") as raw:
+                with gzip.GzipFile(fileobj=raw, mode="ab") as f:
+                    f.write("".join(json.dumps(t.to_dict()) + "\n" for t in month_tasks).encode("utf-8"))
+                raw.flush()
+                os.fsync(raw.fileno())
+        db.remove_tasks(tasks)
+        return len(tasks)
+
+    def months(self):
+        """Archived months, newest first."""
+        names = glob.glob(os.path.join(self.directory, "*.jsonl.gz"))
+        return sorted((os.path.basename(n)[:-len(".jsonl.gz")] for n in names), reverse=True)
+
+    def read_segment(self, month):
+        """Returns the tasks of one month, newest first."""
+        tasks, seen = [], set()
+        with gzip.open(self.segment_path(month), "rt", encoding="utf-8") as f:
+            for line in f:
+                t = Task.from_dict(json.loads(line))
+                if t.id not in seen:
+                    seen.add(t.id)
+                    tasks.append(t)
+        tasks.sort(key=lambda t: t.sort_key, reverse=True)
+        return tasks
+
+    def iter_tasks(self):
+        """Yields archived tasks newest first, opening one segment at a time."""
+        for month in self.months():
+            yield from self.read_segment(month)
+
+    def iter_history(self, db, query=""):
+        """Yields the store's history merged with the archive, newest first.
+
+        The archive isn't indexed; with a 'query' its segments are filtered
+        as they are read, so only as much is scanned as the caller consumes.
+        """
+        archived = self.iter_tasks()
+        words = tokenize(query)
+        if words:
+            archived = (t for t in archived if matches(words, t.task))
+        return heapq.merge(db.history_tasks(query), archived, key=lambda t: t.sort_key, reverse=True)
+
+    def clear(self):
+        """Deletes every archive segment."""
+        shutil.rmtree(self.directory, ignore_errors=True)
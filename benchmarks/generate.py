@@ -0,0 +1,65 @@
+"""Synthetic task-load generator for the benchmarks.
+
+    python benchmarks/generate.py 100000 --dir /tmp/store
+
+writes ultimate_tasks.json with that many tasks into the directory.
+"""
+import argparse
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from task import Task
+
+# Rough shape of a long-lived store: most rows are history
+STATUSES = (["Pending", "Completed", "Deleted"], [35, 50, 15])
+PRIORITIES = (["High", "Normal", "Low"], [20, 60, 20])
+CATEGORIES = (["Work", "Study", "Personal", "Health", "Coding"], [35, 20, 20, 10, 15])
+WORDS = ["review", "email", "report", "gym", "call", "fix", "bug", "plan", "read", "chapter",
+         "groceries", "deploy", "write", "tests", "meeting", "budget", "doctor", "refactor", "notes", "pay"]
+
+def generate_tasks(n, seed=42, now=None):
+    """Returns n Tasks with due dates spread over the last two years and the next one."""
+    rng = random.Random(seed)
+    now = (now or datetime.now()).replace(microsecond=0)
+    statuses = rng.choices(*STATUSES, k=n)
+    priorities = rng.choices(*PRIORITIES, k=n)
+    categories = rng.choices(*CATEGORIES, k=n)
+    tasks = []
+    for i in range(n):
+        status = statuses[i]
+        # History lies in the past; pending work is mostly upcoming, some overdue
+        if status == "Pending":
+            offset = rng.randint(-3 * 86400, 365 * 86400)
+        else:
+            offset = -rng.randint(0, 2 * 365 * 86400)
+        due = now + timedelta(seconds=offset - offset % 300)
+        last = due + timedelta(minutes=rng.randint(0, 60)) if status == "Pending" and due < now and rng.random() < 0.5 else None
+        text = " ".join(rng.choices(WORDS, k=rng.randint(2, 5))) + f" #{i}"
+        tasks.append(Task(text, categories[i], priorities[i], due, status, last))
+    return tasks
+
+def write_store(directory, n, seed=42):
+    """Creates a JSON store with n synthetic tasks in 'directory'."""
+    from database import TaskManager
+    cwd = os.getcwd()
+    os.makedirs(directory, exist_ok=True)
+    os.chdir(directory)
+    try:
+        db = TaskManager()
+        db.bulk_add(generate_tasks(n, seed))
+        db.save_data()
+        db.close()
+    finally:
+        os.chdir(cwd)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic task store.")
+    parser.add_argument("count", type=int)
+    parser.add_argument("--dir", default=".")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    write_store(args.dir, args.count, args.seed)
@@ -0,0 +1,230 @@
+"""Headless benchmark harness.
+
+    python benchmarks/run.py                       # 1k, 10k, 100k and 1M tasks
+    python benchmarks/run.py --sizes 1000 10000 --output results.json
+    python benchmarks/run.py --sizes 10000 --compare results.json
+
+Each size gets a fresh synthetic store in a temp directory. The harness
+times load, save, filter/sort, list refresh, search, reminder scan and export,
+and reports rows/second and peak traced memory. search_keystroke is the
+slowest single keystroke once the index is built, with a store change
+before each one, as while reminders fire in the background. Nothing imports tkinter:
+the list refresh runs views.TreeviewSync and views.VirtualTaskList against
+an in-memory tree.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import database
+from benchmarks.generate import write_store
+from exporter import export_tasks
+from notifications import ReminderSystem
+from views import TreeviewSync, VirtualTaskList
+
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+SEARCH_TEXT = "review em"
+
+class FakeTree:
+    """Stands in for ttk.Treeview: keeps children and item values in Python lists/dicts."""
+
+    def __init__(self):
+        self.children = []
+        self.items = {}
+
+    def get_children(self):
+        return tuple(self.children)
+
+    def insert(self, parent, index, iid, values, tags):
+        self.children.insert(len(self.children) if index == "end" else index, iid)
+        self.items[iid] = (values, tags)
+
+    def delete(self, *iids):
+        gone = set(iids)
+        self.children = [c for c in self.children if c not in gone]
+        for iid in iids:
+            del self.items[iid]
+
+    def move(self, iid, parent, index):
+        self.children.remove(iid)
+        self.children.insert(index, iid)
+
+    def item(self, iid, values, tags):
+        self.items[iid] = (values, tags)
+
+    def bind(self, sequence, func):
+        pass
+
+    def yview_moveto(self, fraction):
+        pass
+
+class FakeScrollbar:
+    def configure(self, **options):
+        pass
+
+    def set(self, first, last):
+        pass
+
+def measure(fn, memory):
+    """Runs fn once for time, and once more under tracemalloc for peak memory if asked.
+
+    If fn returns a number, that is the time (for ops that time only part of their work).
+    """
+    gc.collect()
+    start = time.perf_counter()
+    timed = fn()
+    seconds = time.perf_counter() - start if timed is None else timed
+    peak = None
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        fn()
+        peak = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+    return seconds, peak
+
+def bench_size(n, memory):
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        write_store(tmp, n)
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        try:
+            state = {}
+
+            def load():
+                if "db" in state:
+                    state["db"].close()
+                state["db"] = database.TaskManager()
+
+            def save():
+                state["db"].save_data()
+                state["db"].flush()
+
+            def filter_sort():
+                state["db"].active_tasks()
+                state["db"].active_tasks("Work", "High")
+                state["db"].history_tasks()
+
+            def list_refresh():
+                # A first full paint followed by an incremental one after a single change
+                db = state["db"]
+                sync = TreeviewSync(FakeTree())
+                tasks = db.active_tasks()
+                sync.show(tasks)
+                db.update_task(tasks[len(tasks) // 2], status="Completed")
+                sync.show(db.active_tasks())
+                db.update_task(tasks[len(tasks) // 2], status="Pending")
+
+            def virtual_refresh():
+                # Same, with only a viewport's worth of rows materialized
+                db = state["db"]
+                view = VirtualTaskList(FakeTree(), FakeScrollbar())
+                tasks = db.active_tasks()
+                view.show(tasks)
+                db.update_task(tasks[0], status="Completed")
+                view.show(db.active_tasks())
+                db.update_task(tasks[0], status="Pending")
+
+            def search_typing():
+                # Keystrokes of an as-you-type search (the index is built on the first one)
+                state["db"].active_tasks()
+                for i in range(1, len(SEARCH_TEXT) + 1):
+                    state["db"].active_tasks(query=SEARCH_TEXT[:i])
+
+            def search_keystroke():
+                db = state["db"]
+                db.search.build_async()
+                while not db.search.built:
+                    time.sleep(0.01)
+                task = db.active_tasks()[0]
+                slowest = 0
+                for i in range(1, len(SEARCH_TEXT) + 1):
+                    db.update_task(task, status="Completed" if i % 2 else "Pending")
+                    start = time.perf_counter()
+                    db.active_tasks(query=SEARCH_TEXT[:i])
+                    slowest = max(slowest, time.perf_counter() - start)
+                db.update_task(task, status="Pending")
+                return slowest
+
+            def reminder_scan():
+                # Building the queue, then popping everything already due (never blocks)
+                reminders = ReminderSystem(state["db"], lambda: None)
+                if reminders.heap and reminders.heap[0][0] <= datetime.now():
+                    reminders._pop_due()
+                reminders.stop()
+
+            def export():
+                export_tasks(state["db"], "export.csv")
+
+            ops = [("load", load), ("save", save), ("filter_sort", filter_sort),
+                   ("list_refresh", list_refresh), ("virtual_refresh", virtual_refresh),
+                   ("search_typing", search_typing), ("search_keystroke", search_keystroke),
+                   ("reminder_scan", reminder_scan), ("export_csv", export)]
+            for name, fn in ops:
+                seconds, peak = measure(fn, memory)
+                results.append({
+                    "size": n,
+                    "op": name,
+                    "seconds": round(seconds, 6),
+                    "rows_per_sec": round(n / seconds) if seconds else None,
+                    "peak_mb": round(peak, 2) if peak is not None else None,
+                })
+                print(f"{n:>9} {name:<16} {seconds * 1000:10.1f} ms {results[-1]['rows_per_sec'] or 0:>12} rows/s"
+                      + (f" {peak:9.1f} MB" if peak is not None else ""))
+            state["db"].close()
+        finally:
+            os.chdir(cwd)
+    return results
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except Exception:
+        return None
+
+def compare(results, path):
+    """Prints the time change of every (size, op) against an earlier results file."""
+    with open(path) as f:
+        old = {(r["size"], r["op"]): r for r in json.load(f)["results"]}
+    print(f"\nCompared with {path}:")
+    for r in results:
+        before = old.get((r["size"], r["op"]))
+        if before and before["seconds"]:
+            change = (r["seconds"] - before["seconds"]) / before["seconds"] * 100
+            print(f"{r['size']:>9} {r['op']:<16} {change:+7.1f}%")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark storage, scheduler, list refresh and export.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--output", default="bench_results.json", help="Where to write the JSON results")
+    parser.add_argument("--compare", help="Earlier results file to compare against")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc pass")
+    args = parser.parse_args()
+
+    results = []
+    for n in args.sizes:
+        results.extend(bench_size(n, not args.no_memory))
+
+    with open(args.output, "w") as f:
+        json.dump({
+            "commit": git_commit(),
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "results": results,
+        }, f, indent=2)
+    print(f"\nWrote {args.output}")
+    if args.compare:
+        compare(results, args.compare)
@@ -0,0 +1,168 @@
+import argparse
+import asyncio
+import json
+import sys
+
+from api import PAGE_SIZE, Api, Server, read_ops
+from database import open_task_manager
+from importer import PRIORITIES
+
+# Headless front end: the same store (and TODO_BACKEND setting) as the window,
+# without tkinter. Changes show up in any open window within a second.
+#
+#   python cli.py add "Write report" --due "2026-10-20 09:00" --priority High
+#   python cli.py list --search report
+#   python cli.py done <id> [<id> ...]
+#   python cli.py batch ops.jsonl            (JSON Lines of operations, see api.Api.run)
+#   python cli.py serve --port 8765          (local HTTP/JSON API, see api.Server)
+
+def print_result(result):
+    print(json.dumps(result))
+    return result["ok"]
+
+def print_table(tasks):
+    for d in tasks:
+        print(f"{d['id']}  {d['datetime'] or '-':19}  {d['priority']:6}  {d['category']:8}  {d['status']:9}  {d['task']}")
+
+def run_ops(api, ops):
+    """Runs operations, printing one JSON result per line as each chunk finishes; returns False if any failed."""
+    ok = True
+    for results in api.run_batch(ops):
+        for r in results:
+            ok = print_result(r) and ok
+        sys.stdout.flush()
+    return ok
+
+def cmd_list(api, args):
+    query = {"view": "history" if args.history else "active", "category": args.category,
+             "priority": args.priority, "q": args.search, "offset": args.offset, "limit": args.limit}
+    while True:
+        page = api.query(**query)
+        if args.json:
+            for d in page["tasks"]:
+                print(json.dumps(d))
+        else:
+            print_table(page["tasks"])
+        sys.stdout.flush()
+        if not args.all or page["next"] is None:
+            break
+        query["offset"] = page["next"]
+    if not args.json and not args.all and page["next"] is not None:
+        print(f"... {page['total'] - page['next']} more (--offset {page['next']}, or --all)")
+    return True
+
+def cmd_export(api, args):
+    chunks = api.export(args.format, ",".join(args.columns) if args.columns else None, ",".join(args.status or []),
+                        ",".join(args.category or []), args.start, args.end)
+    if args.path == "-":
+        sys.stdout.writelines(chunks)
+        return True
+    with open(args.path, "w", encoding="utf-8", newline="") as f:
+        f.writelines(chunks)
+    return True
+
+def cmd_import(api, args):
+    from importer import import_tasks
+    result = import_tasks(api.db, args.path)
+    print(json.dumps({"ok": not result.errors, "added": len(result.added), "duplicates": result.duplicates,
+                      "errors": [{"line": line, "error": err} for line, err in result.errors]}))
+    return not result.errors
+
+def cmd_serve(api, args):
+    from notifications import ReminderSystem, stop_on_sigterm
+    stop_on_sigterm()
+    if not args.no_reminders:
+        api.reminders = ReminderSystem(api.db, lambda: None)
+        api.db.subscribe(api.reminders.on_store_changed)
+        api.reminders.start()
+    try:
+        asyncio.run(Server(api, args.host, args.port).serve())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if api.reminders is not None:
+            api.reminders.stop()
+    return True
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Work with the to-do store without the window.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("add", help="add a task")
+    p.add_argument("task")
+    p.add_argument("--due", required=True, help='"YYYY-MM-DD HH:MM" (or a bare date for midnight)')
+    p.add_argument("--category", default="Work")
+    p.add_argument("--priority", default="Normal", choices=PRIORITIES)
+    p.add_argument("--repeat", help='e.g. daily, weekdays, "every 4 hours" or an RRULE')
+
+    for name, text in (("done", "complete tasks"), ("delete", "delete tasks")):
+        sub.add_parser(name, help=text).add_argument("ids", nargs="+")
+    p = sub.add_parser("snooze", help="push tasks back")
+    p.add_argument("ids", nargs="+")
+    p.add_argument("--minutes", type=int, default=10)
+
+    p = sub.add_parser("list", help="list tasks, a page at a time")
+    p.add_argument("--history", action="store_true", help="completed and deleted tasks instead")
+    p.add_argument("--category", default="All")
+    p.add_argument("--priority", default="All")
+    p.add_argument("--search", default="", help="words (or word prefixes) in the title")
+    p.add_argument("--offset", type=int, default=0)
+    p.add_argument("--limit", type=int, default=PAGE_SIZE)
+    p.add_argument("--all", action="store_true", help="stream every page")
+    p.add_argument("--json", action="store_true", help="JSON Lines instead of a table")
+
+    p = sub.add_parser("export", help="stream tasks as JSON Lines or CSV")
+    p.add_argument("path", help="output file, or - for stdout")
+    p.add_argument("--format", default="jsonl", choices=["jsonl", "csv"])
+    p.add_argument("--status", nargs="+")
+    p.add_argument("--category", nargs="+")
+    p.add_argument("--start", help="first due date")
+    p.add_argument("--end", help="due dates before this one")
+    p.add_argument("--columns", nargs="+")
+
+    sub.add_parser("import", help="bulk-import a CSV or JSON Lines file").add_argument("path")
+    sub.add_parser("batch", help="run JSON Lines operations").add_argument(
+        "path", nargs="?", default="-", help="file of operations, or - (default) for stdin")
+
+    p = sub.add_parser("serve", help="serve the local HTTP/JSON API")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--no-reminders", action="store_true", help="don't take part in sending reminders")
+
+    sub.add_parser("daemon", help="send reminders without a window")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "daemon":
+        from notifications import run_daemon
+        run_daemon()
+        return 0
+
+    db = open_task_manager() # JSON journal or SQLite, see TODO_BACKEND
+    api = Api(db)
+    try:
+        if args.command == "add":
+            ok = run_ops(api, [{"op": "add", "task": args.task, "datetime": args.due, "category": args.category,
+                                "priority": args.priority, "repeat": args.repeat}])
+        elif args.command in ("done", "delete", "snooze"):
+            op = {"done": "complete"}.get(args.command, args.command)
+            extra = {"minutes": args.minutes} if args.command == "snooze" else {}
+            ok = run_ops(api, [{"op": op, "id": i, **extra} for i in args.ids])
+        elif args.command == "batch":
+            if args.path == "-":
+                ok = run_ops(api, read_ops(sys.stdin))
+            else:
+                with open(args.path, "r", encoding="utf-8") as f:
+                    ok = run_ops(api, read_ops(f))
+        else:
+            ok = {"list": cmd_list, "export": cmd_export, "import": cmd_import, "serve": cmd_serve}[args.command](api, args)
+    except (ValueError, LookupError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        ok = False
+    finally:
+        db.close() # Waits for pending writes
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,46 +1,669 @@
+import contextlib
 import json
 import os
-import csv
+import threading
+import uuid
+from collections import deque
+from datetime import datetime
+
+import perf
+from exporter import export_tasks
+from locking import FileLock
+from search import ResultCache, SearchIndex, SortedTasks
+from stats import Aggregates, count_completion
+from task import Task
 
 DATA_FILE = "ultimate_tasks.json"
+JOURNAL_FILE = "ultimate_tasks.journal"
+LOCK_FILE = "ultimate_tasks.lock"  # Held by whichever process is reading or writing the files
+COMPACT_EVERY = 500  # Journal records before the snapshot is rewritten in the background
+SAVE_DELAY = 0.25    # Seconds of changes the writer thread gathers into one disk write
+WATCH_INTERVAL = 1.0 # Seconds between checks for changes made by other processes
+KEEP_RECORDS = 200   # Journal records carried over a compaction, so other processes can catch up
+BACKEND = os.environ.get("TODO_BACKEND", "json")  # "json" or "sqlite"
+
+def default_stats():
+    return {"streak": 0, "last_active_date": "", "total_completed": 0}
+
+def open_task_manager():
+    """Returns the task store selected by the TODO_BACKEND environment variable."""
+    if BACKEND == "sqlite":
+        from sqlite_store import SQLiteTaskManager
+        return SQLiteTaskManager()
+    return TaskManager()
+
+class SaveWorker:
+    """Background thread that runs 'write' once per burst of changes.
+
+    mark_dirty() is cheap and never touches the disk; the worker waits up to
+    'delay' seconds for more changes and then writes them all in one go.
+    """
+
+    def __init__(self, write, delay=SAVE_DELAY):
+        self.write = write
+        self.delay = delay
+        self.cond = threading.Condition()
+        self.dirty = False
+        self.busy = False
+        self.urgent = False
+        self.stopped = False
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def mark_dirty(self):
+        with self.cond:
+            self.dirty = True
+            self.cond.notify_all()
+
+    def run(self):
+        while True:
+            with self.cond:
+                self.cond.wait_for(lambda: self.dirty or self.stopped)
+                if not self.dirty:
+                    return
+                # Let a burst of changes pile up unless someone is waiting on flush()
+                self.cond.wait_for(lambda: self.urgent or self.stopped, timeout=self.delay)
+                self.dirty = self.urgent = False
+                self.busy = True
+            try:
+                self.write()
+            except Exception as e:
+                print(f"Error saving data: {e}")
+            with self.cond:
+                self.busy = False
+                self.cond.notify_all()
+
+    def flush(self, timeout=None):
+        """Blocks until every change marked so far has been written."""
+        with self.cond:
+            if self.dirty or self.busy:
+                self.urgent = True
+                self.cond.notify_all()
+                self.cond.wait_for(lambda: not (self.dirty or self.busy), timeout=timeout)
+                self.urgent = False
+
+    def stop(self):
+        self.flush()
+        with self.cond:
+            self.stopped = True
+            self.cond.notify_all()
+        self.thread.join()
+
+def active_key(t):
+    """Sort order of the active list: pending first, then by due date."""
+    return (t.status == "Completed", t.sort_key)
+
+class StoreBase:
+    """What TaskManager and SQLiteTaskManager share: change listeners and CSV export."""
 
-class TaskManager:
     def __init__(self):
-        self.tasks = []
-        self.user_stats = {"streak": 0, "last_active_date": "", "total_completed": 0}
-        self.load_data()
+        self.listeners = []
 
-    def save_data(self):
-        """Saves tasks and stats to JSON file."""
-        try:
-            with open(DATA_FILE, "w") as f:
-                json.dump({"tasks": self.tasks, "stats": self.user_stats}, f)
-        except Exception as e:
-            print(f"Error saving data: {e}")
+    def subscribe(self, callback):
+        """Registers callback(tasks), run on a background thread after another process
+        changed the store. 'tasks' are the changed tasks, or None if everything was reloaded.
+        """
+        self.listeners.append(callback)
 
-    def load_data(self):
-        """Loads tasks from JSON file."""
-        if os.path.exists(DATA_FILE):
+    def _notify(self, changed):
+        if changed == []:
+            return
+        for callback in self.listeners:
             try:
-                with open(DATA_FILE, "r") as f:
-                    d = json.load(f)
-                    self.tasks = d.get("tasks", [])
-                    self.user_stats = d.get("stats", {"streak": 0, "last_active_date": "", "total_completed": 0})
-            except:
-                self.tasks = []
-                self.user_stats = {"streak": 0, "last_active_date": "", "total_completed": 0}
+                callback(changed)
+            except Exception as e:
+                print(f"Error handling store change: {e}")
 
     def export_csv(self, path):
-        """Exports data to a CSV file."""
+        """Exports data to a CSV file (streamed, see exporter.export_tasks)."""
         if path:
             try:
-                with open(path, 'w', newline='', encoding='utf-8') as f:
-                    w = csv.writer(f)
-                    w.writerow(["Task", "Category", "Priority", "Date", "Status"])
-                    for t in self.tasks:
-                        w.writerow([t['task'], t['category'], t['priority'], t['datetime'], t['status']])
+                export_tasks(self, path)
                 return True
             except Exception as e:
                 print(f"Export error: {e}")
                 return False
-        return False
\ No newline at end of file
+        return False
+
+class TaskManager(StoreBase):
+    def __init__(self, save_delay=SAVE_DELAY):
+        super().__init__()
+        self.tasks = []
+        self.user_stats = default_stats()
+        self.aggregates = Aggregates()
+
+        # Every mutation is applied in memory and queued as a journal record
+        # under the lock; the SaveWorker appends queued records in batches and
+        # rewrites the snapshot in DATA_FILE when asked or once the journal
+        # passes COMPACT_EVERY.
+        #
+        # Several processes may share the files. Disk access happens under
+        # LOCK_FILE, and records only get their seq when they are written, so
+        # the journal is one total order of everyone's changes. Before writing,
+        # a process applies the records others appended since it last looked
+        # (the watcher thread also does this every WATCH_INTERVAL); fields it
+        # changed itself and hasn't written yet are kept, because its own
+        # record lands later in the journal and wins for everybody.
+        self.lock = threading.RLock()
+        self.file_lock = FileLock(LOCK_FILE)
+        self.index = {}         # task.id -> Task
+        self.search = SearchIndex(lambda: ((t.id, t.task) for t in self.tasks), self.lock)
+        self.version = 0        # Bumped on every change; invalidates cached results
+        self.results = ResultCache()
+        self.history = ResultCache()
+        self.active = SortedTasks(active_key, lambda t: t.status != "Deleted")  # Patched per change, see _touch
+        self.seq = 0            # Sequence number of the last record applied or written
+        self.snapshot_seq = 0   # Sequence number covered by the snapshot
+        self.pending = []       # Records not yet on disk
+        self.writing = []       # Records the writer thread is putting on disk
+        self.snapshot_wanted = False
+        self.journal = None
+        self.generation = None  # Token of the journal's current incarnation (new on every compaction)
+        self.offset = 0         # Bytes of the journal already applied
+        self.stat = None        # Journal (size, mtime, inode) when last read
+        self.recent = deque(maxlen=KEEP_RECORDS)  # (seq, line) of the latest journal records
+        self.worker = SaveWorker(self._write_pending, save_delay)
+        self.load_data()
+        self.closed = threading.Event()
+        self.watcher = threading.Thread(target=self._watch, daemon=True)
+        self.watcher.start()
+
+    # --- MUTATIONS ---
+
+    def add_task(self, task):
+        """Adds a new task, journals it and returns the stored task.
+        Raises ValueError if a task with its id exists."""
+        with self.lock:
+            if task.id in self.index:
+                raise ValueError(f"a task with id '{task.id}' already exists")
+            self.index[task.id] = task
+            self.tasks.append(task)
+            self.search.add(task.id, task.task)
+            self._log({"op": "add", "task": task.to_dict()})
+            return task
+
+    def update_task(self, task, /, **fields):
+        """Changes fields on a task and journals only the changed fields."""
+        with self.lock:
+            task.update(**fields)
+            if "task" in fields:
+                self.search.add(task.id, task.task)
+            self._log({"op": "set", "id": task.id, "fields": Task.saved_fields(fields)})
+
+    def bulk_add(self, tasks):
+        """Adds many tasks in one go and returns the ones added.
+
+        Tasks whose id, or whose text and due date, already exist are skipped.
+        Large batches are persisted as a single snapshot instead of being
+        appended to the journal.
+        """
+        with self.lock:
+            keys = {(t.task, t.due_str) for t in self.tasks}
+            added = []
+            for t in tasks:
+                key = (t.task, t.due_str)
+                if t.id in self.index or key in keys:
+                    continue
+                keys.add(key)
+                self.index[t.id] = t
+                self.tasks.append(t)
+                self.search.add(t.id, t.task)
+                added.append(t)
+
+            if len(added) > COMPACT_EVERY:
+                self._log({"op": "add_many", "tasks": [t.to_dict() for t in added]})
+                self.snapshot_wanted = True
+            else:
+                for t in added:
+                    self._log({"op": "add", "task": t.to_dict()})
+            return added
+
+    def tally(self, kind, task, now=None):
+        """Counts a task transition in the aggregates and user stats and journals just
+        that event, so counts from several processes add up."""
+        with self.lock:
+            record = Aggregates.event(kind, task, now or datetime.now())
+            self.aggregates.apply(record)
+            count_completion(self.user_stats, record)
+            self._log({"op": "tally", **record})
+
+    def clear_history(self):
+        """Permanently removes completed and deleted tasks."""
+        with self.lock:
+            self.remove_tasks([t for t in self.tasks if t.status in ["Completed", "Deleted"]])
+
+    def remove_tasks(self, tasks):
+        """Drops tasks from the store (e.g. after archiving them)."""
+        with self.lock:
+            ids = [t.id for t in tasks]
+            self._remove(ids)
+            self._log({"op": "remove", "ids": ids})
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """Groups several changes so they reach disk (and other processes) in one write."""
+        with self.lock:
+            yield
+
+    def _remove(self, ids):
+        ids = set(ids)
+        self.tasks = [t for t in self.tasks if t.id not in ids]
+        for task_id in ids:
+            self.index.pop(task_id, None)
+            self.search.discard(task_id)
+
+    # --- QUERIES ---
+
+    def get_task(self, task_id):
+        """Returns the task with this id, or None."""
+        return self.index.get(task_id)
+
+    def active_tasks(self, category="All", priority="All", query=""):
+        """Returns non-deleted tasks matching the filters, pending first, then by due date.
+
+        'query' is matched word by word against the titles through the search index.
+        While the user types, results are filtered out of an earlier (already
+        sorted) result instead of being rebuilt; see search.ResultCache.
+        """
+        with self.lock:
+            key = (self.version, category, priority)
+            # Unfiltered, searching the kept-sorted list beats narrowing a cached one
+            unfiltered = category == "All" and priority == "All"
+            rows = self.results.lookup(key, query, self.search.match, exact=unfiltered)
+            if rows is None:
+                rows = self.active.get(self.tasks, self.index, self.search.match(query))
+                if not unfiltered:
+                    rows = [t for t in rows if (category == "All" or t.category == category)
+                            and (priority == "All" or t.priority == priority)]
+            self.results.store(key, query, rows)
+        return rows
+
+    def history_tasks(self, query=""):
+        """Returns completed and deleted tasks (matching 'query'), newest due date first.
+        Cached like active_tasks."""
+        with self.lock:
+            key = (self.version,)
+            rows = self.history.lookup(key, query, self.search.match)
+            if rows is None:
+                rows = [t for t in self._searched(query) if t.status in ["Completed", "Deleted"]]
+                rows.sort(key=lambda x: x.sort_key, reverse=True)
+            self.history.store(key, query, rows)
+        return rows
+
+    def _searched(self, query):
+        """All tasks, or only those whose title matches 'query' (caller holds the lock)."""
+        ids = self.search.match(query)
+        if ids is None:
+            return self.tasks
+        return [self.index[i] for i in ids]
+
+    def finished_before(self, cutoff):
+        """Returns completed and deleted tasks due before 'cutoff'."""
+        with self.lock:
+            return [t for t in self.tasks if t.status in ["Completed", "Deleted"]
+                    and t.due is not None and t.due < cutoff]
+
+    def pending_tasks(self):
+        """Returns tasks that can still trigger a reminder."""
+        with self.lock:
+            return [t for t in self.tasks if t.status == "Pending"]
+
+    def export_query(self, statuses=None, categories=None, start=None, end=None):
+        """Returns (count, iterator of saved-form dicts) for tasks matching the filters.
+
+        start/end are datetimes bounding the due date (start inclusive, end exclusive).
+        """
+        with self.lock:
+            rows = [t for t in self.tasks
+                    if (statuses is None or t.status in statuses)
+                    and (categories is None or t.category in categories)
+                    and (start is None or (t.due is not None and t.due >= start))
+                    and (end is None or (t.due is not None and t.due < end))]
+        return len(rows), (t.to_dict() for t in rows)
+
+    # --- STORAGE ---
+
+    def _log(self, record):
+        """Queues a journal record for the writer thread (caller holds the lock).
+
+        The record gets its seq when it is written, after any records other
+        processes appended first.
+        """
+        self.version += 1
+        self._touch(record)
+        self.pending.append(record)
+        self.worker.mark_dirty()
+
+    def _touch(self, record):
+        """Marks the tasks a record changes for re-sorting in the active list."""
+        op = record.get("op")
+        if op == "add" and "id" in record["task"]:
+            self.active.touch([record["task"]["id"]])
+        elif op == "add_many":
+            self.active.touch(d["id"] for d in record["tasks"])
+        elif op == "remove":
+            self.active.touch(record["ids"])
+        elif op == "set" and "id" in record:
+            self.active.touch([record["id"]])
+        elif op in ("add", "set"):
+            self.active.reset() # Old journals address tasks by position
+
+    def _snapshot(self):
+        """Serializes the full state; due dates that didn't change reuse their stored text."""
+        return json.dumps({"tasks": [t.to_dict() for t in self.tasks], "stats": self.user_stats,
+                           "aggregates": self.aggregates.to_dict(), "seq": self.seq})
+
+    def _write_snapshot(self, data):
+        """Writes the snapshot to a temp file and atomically renames it into place."""
+        tmp = DATA_FILE + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, DATA_FILE)
+
+    def _journal_stat(self):
+        try:
+            st = os.stat(JOURNAL_FILE)
+            return st.st_size, st.st_mtime_ns, st.st_ino
+        except OSError:
+            return None
+
+    @perf.timed("save_data")
+    def _write_pending(self):
+        """Writer thread: appends queued records in one write, or folds them into a new snapshot."""
+        with self.lock:
+            records, self.pending = self.pending, []
+            self.writing = records
+            rebase, self.snapshot_wanted = self.snapshot_wanted, False
+        try:
+            with self.file_lock:
+                changed = self._write_locked(records, rebase)
+        finally:
+            with self.lock:
+                self.writing = []
+        self._notify(changed)
+
+    def _write_locked(self, records, rebase):
+        """Numbers and writes 'records' while holding LOCK_FILE; returns what other processes changed."""
+        with self.lock:
+            changed = self._catch_up()
+            for r in records:
+                self.seq += 1
+                r["seq"] = self.seq
+            lines = []
+            snapshot = None
+            if rebase:
+                # The snapshot holds changes no record describes (e.g. a large
+                # import), so it gets a seq of its own and other processes reload it
+                self.seq += 1
+                self.recent.clear()
+            else:
+                lines = [(r["seq"], (json.dumps(r) + "\n").encode("utf-8")) for r in records]
+            if rebase or self.seq - self.snapshot_seq >= COMPACT_EVERY:
+                snapshot = self._snapshot()
+            seq = self.seq
+
+        if snapshot is not None:
+            try:
+                self._compact(snapshot, seq, lines)
+                return changed
+            except Exception as e:
+                print(f"Error saving snapshot: {e}")
+                lines = [(r["seq"], (json.dumps(r) + "\n").encode("utf-8")) for r in records]
+        if lines:
+            data = b"".join(line for _, line in lines)
+            self.journal.write(data)
+            self.journal.flush()
+            os.fsync(self.journal.fileno())
+            self.offset += len(data)
+            self.recent.extend(lines)
+            self.stat = self._journal_stat()
+        return changed
+
+    def _compact(self, snapshot, seq, lines):
+        """Writes the snapshot and starts a new journal generation (caller holds LOCK_FILE).
+
+        The new journal opens with a base record and keeps the last
+        KEEP_RECORDS records, so a process that was only a little behind
+        catches up from them instead of reloading the snapshot. A crash
+        between the two writes is harmless: load_data skips records up to
+        the snapshot's seq.
+        """
+        self._write_snapshot(snapshot)
+        self.recent.extend(lines)
+        kept = list(self.recent)
+        generation = uuid.uuid4().hex
+        base = {"op": "base", "seq": seq, "from": kept[0][0] - 1 if kept else seq, "gen": generation}
+        data = (json.dumps(base) + "\n").encode("utf-8") + b"".join(line for _, line in kept)
+        self.journal.truncate(0)
+        self.journal.write(data)
+        self.journal.flush()
+        os.fsync(self.journal.fileno())
+        self.generation = generation
+        self.offset = len(data)
+        self.stat = self._journal_stat()
+        with self.lock:
+            self.snapshot_seq = seq
+
+    def _catch_up(self):
+        """Applies the records other processes appended since this one last read the journal.
+
+        Returns the tasks they touched, or None if everything was reloaded
+        (another process compacted the journal while this one was too far
+        behind). Caller holds LOCK_FILE and the lock.
+        """
+        try:
+            f = open(JOURNAL_FILE, "r+b")
+        except FileNotFoundError:
+            return []
+        records = []
+        with f:
+            head = f.readline()
+            try:
+                base = json.loads(head)
+                base = base if base.get("op") == "base" else None
+            except ValueError:
+                base = None
+            generation = base["gen"] if base else None
+            if generation != self.generation:
+                if base is None or self.seq < base["from"]:
+                    return self._reload()
+                self.generation = generation
+                self.offset = len(head)
+
+            f.seek(self.offset)
+            for line in iter(f.readline, b""):
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("incomplete record")
+                    record = json.loads(line)
+                    seq = record["seq"]
+                except (ValueError, KeyError, TypeError):
+                    # Torn write from a process that crashed; cut it off so appends stay readable
+                    f.truncate(self.offset)
+                    break
+                self.offset += len(line)
+                if seq > self.seq:
+                    self.seq = seq
+                    self.recent.append((seq, line))
+                    records.append(record)
+        return self._merge(records)
+
+    def _merge(self, records):
+        """Applies records written by other processes; returns the tasks they touched.
+
+        Fields this process changed but hasn't written yet are left alone:
+        its own record comes later in the journal and wins everywhere.
+        """
+        if not records:
+            return []
+        unwritten = set()
+        for r in self.writing + self.pending:
+            if r["op"] == "set":
+                unwritten.update((r["id"], k) for k in r["fields"])
+
+        changed = {}
+        for record in records:
+            op = record.get("op")
+            if op == "set" and record.get("id") in self.index:
+                record["fields"] = {k: v for k, v in record["fields"].items() if (record["id"], k) not in unwritten}
+                changed[record["id"]] = self.index[record["id"]]
+            elif op == "remove":
+                changed.update((i, self.index[i]) for i in record["ids"] if i in self.index)
+            self._apply(record)
+            if op == "add":
+                changed[record["task"]["id"]] = self.index[record["task"]["id"]]
+            elif op == "add_many":
+                changed.update((d["id"], self.index[d["id"]]) for d in record["tasks"])
+
+        for task_id, t in changed.items():
+            if task_id in self.index:
+                self.search.add(task_id, t.task)
+        self.version += 1
+        return list(changed.values())
+
+    def _reload(self):
+        """Reads the files from scratch, then re-applies this process's unwritten changes."""
+        local = self.writing + self.pending
+        self._load()
+        for r in local:
+            self._apply(r)
+        return None
+
+    def save_data(self):
+        """Schedules a full snapshot of tasks and stats (see flush())."""
+        with self.lock:
+            self.snapshot_wanted = True
+        self.worker.mark_dirty()
+
+    def flush(self):
+        """Blocks until every change so far is on disk. Call before exiting."""
+        self.worker.flush()
+
+    def close(self):
+        self.closed.set()
+        self.watcher.join()
+        self.worker.stop()
+        self.journal.close()
+
+    # --- CHANGES FROM OTHER PROCESSES ---
+
+    def sync(self):
+        """Applies whatever other processes wrote since the last look and tells the subscribers."""
+        with self.file_lock, self.lock:
+            changed = self._catch_up()
+            self.stat = self._journal_stat()
+        self._notify(changed)
+
+    def _watch(self):
+        """Watcher thread: stat()s the journal and only reads it when it changed."""
+        while not self.closed.wait(WATCH_INTERVAL):
+            if self._journal_stat() != self.stat:
+                try:
+                    self.sync()
+                except Exception as e:
+                    print(f"Error reading changes: {e}")
+
+    def _apply(self, record):
+        self._touch(record)
+        op = record.get("op")
+        if op == "add":
+            if record["task"].get("id") in self.index:
+                return False
+            task = Task.from_dict(record["task"])
+            self.tasks.append(task)
+            self.index[task.id] = task
+            return 'id' not in record["task"]
+        elif op == "add_many":
+            for d in record["tasks"]:
+                if d["id"] not in self.index:
+                    task = Task.from_dict(d)
+                    self.tasks.append(task)
+                    self.index[task.id] = task
+        elif op == "remove":
+            self._remove(record["ids"])
+        elif op == "set" and "pos" in record:
+            self.tasks[record["pos"]]._set_saved(record["fields"]) # Journals from before task ids
+        elif op == "set" and record["id"] in self.index:
+            self.index[record["id"]]._set_saved(record["fields"])
+        elif op == "stats":
+            self.user_stats = record["stats"] # Journals from before stats were tallied
+        elif op == "tally":
+            self.aggregates.apply(record)
+            count_completion(self.user_stats, record)
+
+    def _load(self):
+        """Reads the snapshot and replays the journal records written after it.
+
+        Caller holds LOCK_FILE and the lock. Returns True if the result should
+        be saved back as a new snapshot.
+        """
+        self.tasks = []
+        self.index = {}
+        self.search.reset()
+        self.active.reset()
+        self.version += 1
+        self.user_stats = default_stats()
+        self.aggregates = Aggregates()
+        self.seq = self.snapshot_seq = 0
+        self.recent.clear()
+        missing = False
+        backfill = False
+        if os.path.exists(DATA_FILE):
+            try:
+                with open(DATA_FILE, "r", encoding="utf-8") as f:
+                    d = json.load(f)
+                    raw = d.get("tasks", [])
+                    missing = any('id' not in t for t in raw)
+                    self.tasks = [Task.from_dict(t) for t in raw]
+                    self.user_stats = d.get("stats", default_stats())
+                    self.aggregates = Aggregates(d.get("aggregates"))
+                    backfill = "aggregates" not in d
+                    self.seq = self.snapshot_seq = d.get("seq", 0)
+                    self.index = {t.id: t for t in self.tasks}
+            except:
+                self.tasks = []
+                self.index = {}
+                self.user_stats = default_stats()
+
+        self.generation = None
+        self.offset = 0
+        if os.path.exists(JOURNAL_FILE):
+            with open(JOURNAL_FILE, "r+b") as f:
+                for line in iter(f.readline, b""):
+                    try:
+                        if not line.endswith(b"\n"):
+                            raise ValueError("incomplete record")
+                        record = json.loads(line)
+                        if record.get("op") == "base":
+                            self.generation = record["gen"]
+                        elif record["seq"] > self.seq:
+                            missing = self._apply(record) or missing
+                            self.seq = record["seq"]
+                            self.recent.append((self.seq, line))
+                    except (ValueError, KeyError, IndexError, TypeError):
+                        break # Torn write from a crash; drop it and everything after
+                    self.offset = f.tell()
+                f.truncate(self.offset)
+        self.stat = self._journal_stat()
+
+        # Snapshots from before the stats engine seed it from the completed tasks
+        if backfill:
+            self.aggregates.backfill(self.tasks)
+        return missing or backfill
+
+    @perf.timed("load_data")
+    def load_data(self):
+        """Loads the snapshot and replays any journal records written after it."""
+        self.worker.flush()
+        with self.file_lock, self.lock:
+            self.pending = []
+            rewrite = self._load()
+            if self.journal is not None:
+                self.journal.close()
+            self.journal = open(JOURNAL_FILE, "ab")
+
+            # Tasks saved before ids existed got fresh ones; persist them (and any backfill) once
+            if rewrite:
+                self.save_data()
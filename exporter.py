@@ -0,0 +1,113 @@
+import csv
+import gzip
+import io
+import json
+import os
+import threading
+
+import perf
+
+# Column label -> saved field name
+COLUMNS = {
+    "Task": "task",
+    "Category": "category",
+    "Priority": "priority",
+    "Date": "datetime",
+    "Status": "status",
+    "Last Reminded": "last_reminded",
+    "ID": "id",
+    "Repeat": "repeat",
+    "Created": "created",
+}
+DEFAULT_COLUMNS = ["Task", "Category", "Priority", "Date", "Status"]
+CHUNK_SIZE = 2000  # Rows buffered in memory between writes (and progress reports)
+
+def export_format(path):
+    """'jsonl' for .jsonl/.json (optionally .gz) files, otherwise 'csv'."""
+    name = path[:-3] if path.endswith(".gz") else path
+    return "jsonl" if name.endswith((".jsonl", ".json")) else "csv"
+
+def open_output(path):
+    if path.endswith(".gz"):
+        return gzip.open(path, "wt", encoding="utf-8", newline="")
+    return open(path, "w", encoding="utf-8", newline="")
+
+def iter_chunks(rows, columns, fmt):
+    """Formats saved-form rows as CSV or JSON Lines text, yielding (text, rows so far)
+    every CHUNK_SIZE rows and once at the end. The CSV header starts the first chunk."""
+    keys = [COLUMNS[c] for c in columns]
+    written = 0
+    buf = io.StringIO()
+    w = csv.writer(buf)
+    if fmt == "csv":
+        w.writerow(columns)
+    for row in rows:
+        if fmt == "csv":
+            w.writerow([row[k] for k in keys])
+        else:
+            buf.write(json.dumps({k: row[k] for k in keys}) + "\n")
+        written += 1
+        if written % CHUNK_SIZE == 0:
+            yield buf.getvalue(), written
+            buf.seek(0)
+            buf.truncate()
+    if buf.tell() or written % CHUNK_SIZE:
+        yield buf.getvalue(), written
+
+@perf.timed("export_csv")
+def export_tasks(db, path, columns=DEFAULT_COLUMNS, filters=None, progress=None, cancel=None):
+    """Streams tasks from the store to a CSV or JSON-Lines file in chunks.
+
+    filters are passed to db.export_query (statuses, categories, start, end).
+    progress(written, total) is called after every chunk. Returns the number
+    of rows written, or None if 'cancel' (a threading.Event) was set, in which
+    case the partial file is removed.
+    """
+    total, rows = db.export_query(**(filters or {}))
+    written = 0
+    cancelled = False
+
+    with open_output(path) as f:
+        for text, written in iter_chunks(rows, columns, export_format(path)):
+            f.write(text)
+            if progress: progress(written, total)
+            if cancel is not None and cancel.is_set():
+                cancelled = True
+                break
+
+    if cancelled:
+        os.remove(path)
+        return None
+    return written
+
+class ExportJob:
+    """Runs export_tasks on a worker thread.
+
+    on_progress(written, total) and on_done(written, error) are called from
+    the worker thread; the UI wraps them in root.after.
+    """
+
+    def __init__(self, db, path, columns=DEFAULT_COLUMNS, filters=None, on_progress=None, on_done=None):
+        self.db = db
+        self.path = path
+        self.columns = columns
+        self.filters = filters
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.cancelled = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def run(self):
+        written, error = None, None
+        try:
+            written = export_tasks(self.db, self.path, self.columns, self.filters, self.on_progress, self.cancelled)
+        except Exception as e:
+            error = e
+        if self.on_done:
+            self.on_done(written, error)
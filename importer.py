@@ -0,0 +1,107 @@
+import csv
+import gzip
+import json
+from datetime import datetime
+
+from exporter import COLUMNS, export_format
+from recurrence import parse_rule
+from task import DATE_FORMAT, Task
+
+PRIORITIES = ["High", "Normal", "Low"]
+STATUSES = ["Pending", "Completed", "Deleted"]
+BATCH_SIZE = 1000  # Rows parsed between progress reports
+
+# Accept both the export's column labels and the saved field names as CSV headers
+FIELDS = {k.lower(): v for k, v in COLUMNS.items()}
+FIELDS.update({v: v for v in COLUMNS.values()})
+
+class ImportResult:
+    def __init__(self):
+        self.added = []
+        self.duplicates = 0
+        self.errors = []  # (line number, message)
+
+def open_input(path):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    return open(path, "r", encoding="utf-8", newline="")
+
+def read_rows(f, fmt):
+    """Yields (line number, row dict keyed by saved field names); bad JSON lines yield the error."""
+    if fmt == "csv":
+        reader = csv.reader(f)
+        header = [FIELDS.get(h.strip().lower(), h.strip().lower()) for h in next(reader, [])]
+        for row in reader:
+            if any(cell.strip() for cell in row):
+                yield reader.line_num, dict(zip(header, row))
+    else:
+        for n, line in enumerate(f, 1):
+            if line.strip():
+                try:
+                    yield n, json.loads(line)
+                except ValueError as e:
+                    yield n, e
+
+def parse_date(text):
+    """Parses 'YYYY-MM-DD HH:MM:SS', 'YYYY-MM-DD HH:MM' or a bare 'YYYY-MM-DD' (midnight)."""
+    for fmt in (DATE_FORMAT, "%Y-%m-%d %H:%M"):
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            pass
+    return datetime.strptime(text, "%Y-%m-%d")
+
+def parse_row(row):
+    """Validates one imported row and returns a Task, raising ValueError on bad data."""
+    if not isinstance(row, dict):
+        raise ValueError(f"not a JSON object: {row}")
+    text = str(row.get("task") or "").strip()
+    if not text:
+        raise ValueError("missing task text")
+    due_text = str(row.get("datetime") or "").strip()
+    if not due_text:
+        raise ValueError("missing due date")
+    priority = row.get("priority") or "Normal"
+    if priority not in PRIORITIES:
+        raise ValueError(f"unknown priority '{priority}'")
+    status = row.get("status") or "Pending"
+    if status not in STATUSES:
+        raise ValueError(f"unknown status '{status}'")
+    last = row.get("last_reminded")
+    repeat = parse_rule(str(row["repeat"])).text if row.get("repeat") else None
+    created = parse_date(str(row["created"])) if row.get("created") else None
+    return Task(text, str(row.get("category") or "Work"), priority, parse_date(due_text), status,
+                parse_date(str(last)) if last else None, id=str(row["id"]) if row.get("id") else None, repeat=repeat, created=created)
+
+def import_tasks(db, path, progress=None):
+    """Streams a CSV or JSON-Lines file (optionally .gz) into the store.
+
+    Rows are validated in batches; bad rows are reported in the result instead
+    of aborting the import. Everything valid is added with one db.bulk_add call,
+    which skips tasks that already exist, so the store persists once.
+    progress(rows read) is called after every batch.
+    """
+    result = ImportResult()
+    tasks = []
+    with open_input(path) as f:
+        batch = []
+        for item in read_rows(f, export_format(path)):
+            batch.append(item)
+            if len(batch) >= BATCH_SIZE:
+                _parse_batch(batch, tasks, result)
+                batch = []
+                if progress: progress(len(tasks) + len(result.errors))
+        _parse_batch(batch, tasks, result)
+
+    result.added = db.bulk_add(tasks)
+    result.duplicates = len(tasks) - len(result.added)
+    return result
+
+def _parse_batch(batch, tasks, result):
+    for line, row in batch:
+        try:
+            if isinstance(row, Exception):
+                raise ValueError(f"invalid JSON ({row})")
+            tasks.append(parse_row(row))
+        except ValueError as e:
+            result.errors.append((line, str(e)))
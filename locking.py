@@ -0,0 +1,108 @@
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+def _lock(fd, blocking):
+    """Locks an open file descriptor; returns False if blocking=False and it is taken."""
+    if fcntl is not None:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            return True
+        except BlockingIOError:
+            return False
+    while True:
+        try:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            if not blocking:
+                return False
+            time.sleep(0.01)
+
+def _unlock(fd):
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+def _try_open_locked(path, blocking):
+    """Opens 'path' and locks it; returns the descriptor, or None if it is taken."""
+    fd = os.open(path, os.O_RDWR | os.O_CREAT)
+    if _lock(fd, blocking):
+        return fd
+    os.close(fd)
+    return None
+
+class FileLock:
+    """Exclusive advisory lock on a file, shared by every process using the same path.
+
+    Usable as a context manager (blocking). Re-entrant within one process:
+    nested acquires only count. The OS drops the lock if the process dies.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.fd = None
+        self.depth = 0
+        self.mutex = threading.RLock()  # Threads of this process take turns
+
+    def acquire(self, blocking=True):
+        """Takes the lock; with blocking=False returns False instead of waiting."""
+        if not self.mutex.acquire(blocking):
+            return False
+        if self.depth == 0:
+            self.fd = _try_open_locked(self.path, blocking)
+            if self.fd is None:
+                self.mutex.release()
+                return False
+        self.depth += 1
+        return True
+
+    def release(self):
+        self.depth -= 1
+        if self.depth == 0:
+            _unlock(self.fd)
+            os.close(self.fd)
+            self.fd = None
+        self.mutex.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+class Leadership:
+    """Elects one process among those sharing 'path' (e.g. to fire reminders).
+
+    The first process to call try_lead() keeps the lock until it resigns or
+    exits; the others keep calling try_lead() and take over after that. Any
+    thread may resign.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.fd = None
+
+    @property
+    def leading(self):
+        return self.fd is not None
+
+    def try_lead(self):
+        if self.fd is None:
+            self.fd = _try_open_locked(self.path, blocking=False)
+        return self.fd is not None
+
+    def resign(self):
+        fd, self.fd = self.fd, None
+        if fd is not None:
+            _unlock(fd)
+            os.close(fd)
@@ -1,11 +1,53 @@
+import time
+STARTED = time.perf_counter()  # Time-to-first-paint is measured from here
+
+import functools
+import itertools
+import os
+import threading
 import tkinter as tk
 from tkinter import messagebox, ttk, filedialog
-from tkcalendar import DateEntry
 from datetime import datetime, timedelta
 
 # IMPORT THE OTHER FILES
-from database import TaskManager
+# (tkcalendar, the archive and the importer are imported when first used)
+import actions
+import perf
+from database import open_task_manager
+from exporter import COLUMNS, DEFAULT_COLUMNS, ExportJob
+from task import Task
 from notifications import ReminderSystem
+from recurrence import expand, parse_rule, rule_for, series_id
+from startup import load_first_screen, log_startup, save_first_screen
+from stats import COMPLETED, CREATED, ON_TIME, OVERDUE, SNOOZED
+from views import TreeviewSync, VirtualTaskList
+
+FRAME_MS = 16  # Refresh requests within one frame are merged into a single repaint
+LIST_MODE = os.environ.get("TODO_LIST_MODE", "virtual")  # "virtual" or "full"
+HISTORY_PAGE = 200  # History rows loaded per scroll step
+STORE_RETRY_MS = 100  # How often a click made during the background load checks whether it finished
+
+def needs_store(method):
+    """For handlers that use self.db: while the background load is still running the
+    call is retried a little later instead of blocking the window (and dropped if
+    the load failed)."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.store_ready.is_set():
+            return method(self, *args, **kwargs)
+        if self.store_error is None:
+            self.root.after(STORE_RETRY_MS, lambda: wrapper(self, *args, **kwargs))
+    return wrapper
+
+class PlainDateEntry(tk.Entry):
+    """YYYY-MM-DD text field used when tkcalendar isn't installed."""
+
+    def __init__(self, master, **options):
+        super().__init__(master, width=12)
+        self.insert(0, datetime.now().strftime("%Y-%m-%d"))
+
+    def get_date(self):
+        return datetime.strptime(self.get().strip(), "%Y-%m-%d").date()
 
 class TodoApp:
     def __init__(self, root):
@@ -19,29 +61,119 @@ class TodoApp:
         self.root.columnconfigure(0, weight=1)
         self.root.rowconfigure(3, weight=1)
 
-        # --- LOAD DATABASE ---
-        self.db = TaskManager() # Initialize the separate database file
-        self.check_streak()
+        # --- FIRST SCREEN ---
+        # The top of the list from the last session is painted straight away;
+        # the store, the reminders and the archive load on a background thread
+        # (see hydrate) and the list is refreshed from the real data after that.
+        self.db = None
+        self.store_ready = threading.Event()
+        self.store_error = None
+        self.timings = {}
+        first_tasks, streak = load_first_screen()
 
-        # --- LOAD NOTIFICATIONS ---
-        # We pass 'self.db' so it can see tasks, and 'self.update_ui_safe' to refresh screen
-        self.notifier = ReminderSystem(self.db, self.update_ui_safe)
-        self.notifier.start()
-
-        self.filters = {"category": "All", "priority": "All"}
+        self.filters = {"category": "All", "priority": "All", "query": ""}
+        self.refresh_pending = False
 
         # --- Styles ---
         self.setup_styles()
 
         # --- UI Construction ---
-        self.create_header()
+        self.create_header(streak)
         self.create_input_area()
         self.create_filter_bar()
         self.create_task_list()
+        self.task_view.show(first_tasks)
+
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.root.bind("<F12>", lambda event: self.toggle_diagnostics())
+        self.diag_win = None
+
+        self.tree.bind("<Map>", self.on_first_paint, add="+")
+        threading.Thread(target=self.hydrate, daemon=True).start()
+
+    def on_first_paint(self, event):
+        """Records time-to-first-paint, then builds the parts of the UI that can wait."""
+        self.tree.unbind("<Map>")
+        self.root.after_idle(self.after_first_paint)
+
+    def after_first_paint(self):
+        self.timings["first_paint"] = time.perf_counter() - STARTED
+        perf.record("first_paint", self.timings["first_paint"])
+        if self.date_entry is None:
+            self.create_date_entry()
+        self.startup_done()
+
+    def hydrate(self):
+        """Background half of startup: loads the store and starts reminders and archiving."""
+        try:
+            self.db = open_task_manager() # JSON journal or SQLite, see TODO_BACKEND
+        except Exception as e:
+            print(f"Error loading tasks: {e}")
+            self.store_error = e
+            self.root.after(0, self.on_store_failed)
+            return
+
+        # --- LOAD NOTIFICATIONS ---
+        # We pass 'self.db' so it can see tasks, and 'self.update_ui_safe' to refresh screen
+        self.notifier = ReminderSystem(self.db, self.update_ui_safe)
+        self.notifier.start()
+        # Other windows, the CLI or the reminder daemon may change the same store
+        self.db.subscribe(self.on_store_changed)
+
+        from archive import Archiver
+        self.archiver = Archiver()
+        self.store_ready.set()
+        self.root.after(0, self.on_hydrated)
+        self.db.search.build_async() # Searches scan the tasks until the index is ready
+
+        # Old finished tasks move to the archive without blocking startup
+        self.archive_history()
+
+    def on_store_failed(self):
+        messagebox.showerror("Error", f"Could not load your tasks:\n{self.store_error}")
+        self.root.destroy()
+
+    def on_hydrated(self):
+        self.timings["hydrated"] = time.perf_counter() - STARTED
+        self.show_streak()
+        self.request_refresh()
+        self.startup_done()
+
+    def startup_done(self):
+        """Logs the launch once both the first paint and the background load have finished."""
+        if "first_paint" in self.timings and "hydrated" in self.timings:
+            log_startup(self.timings, pending=len(self.db.pending_tasks()))
+
+    @needs_store
+    def on_close(self):
+        """Stops the reminder thread and waits for pending saves before exiting."""
+        # Saved for the next launch's first paint
+        save_first_screen(expand(self.db.active_tasks(), datetime.now()), self.db.user_stats['streak'])
+        self.notifier.stop()
+        self.db.flush()
+        self.root.destroy()
+
+    def archive_history(self):
+        try:
+            if self.archiver.run(self.db):
+                self.update_ui_safe()
+        except Exception as e:
+            print(f"Archive error: {e}")
+
+    def on_store_changed(self, tasks):
+        """Store listener: another process changed 'tasks' (None: all of them)."""
+        self.notifier.on_store_changed(tasks)
+        self.update_ui_safe()
 
     def update_ui_safe(self):
         """Helper to update UI from background thread"""
-        self.root.after(0, self.update_listbox)
+        self.root.after(0, self.request_refresh)
+
+    def request_refresh(self):
+        """Schedules update_listbox for the next frame unless one is already pending."""
+        if not self.refresh_pending:
+            self.refresh_pending = True
+            self.root.after(FRAME_MS, self.update_listbox)
 
     def setup_styles(self):
         style = ttk.Style()
@@ -50,14 +182,14 @@ class TodoApp:
         style.configure("Treeview.Heading", font=("Segoe UI", 11, "bold"), background="#0984e3", foreground="white")
         style.map('Treeview', background=[('selected', '#6c5ce7')])
 
-    def create_header(self):
+    def create_header(self, streak):
         header = tk.Frame(self.root, bg="#2d3436")
         header.grid(row=0, column=0, sticky="ew", padx=20, pady=15)
         header.columnconfigure(1, weight=1)
 
         tk.Label(header, text="My Command Center", font=("Segoe UI", 20, "bold"), bg="#2d3436", fg="white").grid(row=0, column=0, sticky="w")
         
-        streak_text = f"🔥 Streak: {self.db.user_stats['streak']} Days"
+        streak_text = f"🔥 Streak: {streak} Days"
         self.streak_lbl = tk.Label(header, text=streak_text, font=("Segoe UI", 14, "bold"), bg="#2d3436", fg="#fab1a0")
         self.streak_lbl.grid(row=0, column=2, sticky="e")
 
@@ -85,10 +217,10 @@ class TodoApp:
         self.priority_var = tk.StringVar(value="Normal")
         ttk.Combobox(frame, textvariable=self.priority_var, values=["High", "Normal", "Low"], state="readonly", width=8).grid(row=1, column=3, sticky="ew", padx=5)
 
-        # Date
+        # Date (the calendar widget is created after the first paint, see create_date_entry)
         tk.Label(frame, text="Due:", bg="#2d3436", fg="white").grid(row=1, column=4, sticky="w", padx=5)
-        self.date_entry = DateEntry(frame, width=10, background='darkblue', foreground='white', borderwidth=2)
-        self.date_entry.grid(row=1, column=5, sticky="ew", padx=5)
+        self.input_frame = frame
+        self.date_entry = None
 
         # Time
         time_frame = tk.Frame(frame, bg="#2d3436")
@@ -100,9 +232,23 @@ class TodoApp:
         ttk.Combobox(time_frame, textvariable=self.minute_var, values=[f"{i:02d}" for i in range(0,60,5)], width=3, state="readonly").pack(side=tk.LEFT)
         ttk.Combobox(time_frame, textvariable=self.ampm_var, values=["AM", "PM"], width=4, state="readonly").pack(side=tk.LEFT)
 
+        # Repeat (a preset, "every N hours/days/weeks" or an RRULE such as FREQ=WEEKLY;BYDAY=MO,TH)
+        tk.Label(frame, text="Repeat:", bg="#2d3436", fg="white").grid(row=2, column=0, sticky="w", padx=5, pady=(10, 0))
+        self.repeat_var = tk.StringVar(value="None")
+        ttk.Combobox(frame, textvariable=self.repeat_var, values=["None", "Daily", "Weekdays", "Weekly", "Every 4 hours"], width=10).grid(row=2, column=1, columnspan=3, sticky="ew", padx=5, pady=(10, 0))
+
         # Add Button
         tk.Button(frame, text="➕ Add", bg="#00b894", fg="white", font=("Segoe UI", 9, "bold"), command=self.add_task, width=10).grid(row=1, column=7, padx=10, sticky="e")
 
+    def create_date_entry(self):
+        """Imports tkcalendar (slow) and puts its DateEntry into the input area."""
+        try:
+            from tkcalendar import DateEntry
+        except ImportError:
+            DateEntry = PlainDateEntry
+        self.date_entry = DateEntry(self.input_frame, width=10, background='darkblue', foreground='white', borderwidth=2)
+        self.date_entry.grid(row=1, column=5, sticky="ew", padx=5)
+
     def create_filter_bar(self):
         frame = tk.Frame(self.root, bg="#2d3436")
         frame.grid(row=2, column=0, sticky="ew", padx=20, pady=10)
@@ -112,7 +258,7 @@ class TodoApp:
         def apply_filter(event=None):
             self.filters['category'] = self.filter_cat.get()
             self.filters['priority'] = self.filter_pri.get()
-            self.update_listbox()
+            self.request_refresh()
 
         self.filter_cat = ttk.Combobox(frame, values=["All", "Work", "Study", "Personal", "Health", "Coding"], state="readonly", width=10)
         self.filter_cat.set("All")
@@ -124,7 +270,18 @@ class TodoApp:
         self.filter_pri.pack(side=tk.LEFT, padx=5)
         self.filter_pri.bind("<<ComboboxSelected>>", apply_filter)
 
-        tk.Button(frame, text="💾 Export CSV", bg="#636e72", fg="white", font=("Segoe UI", 8), command=self.export_csv).pack(side=tk.RIGHT)
+        # Search as you type; keystrokes within a frame share one refresh
+        tk.Label(frame, text="Search:", bg="#2d3436", fg="white").pack(side=tk.LEFT, padx=(10, 0))
+        self.search_var = tk.StringVar()
+        tk.Entry(frame, textvariable=self.search_var, width=20).pack(side=tk.LEFT, padx=5)
+
+        def apply_search(*args):
+            self.filters['query'] = self.search_var.get()
+            self.request_refresh()
+        self.search_var.trace_add("write", apply_search)
+
+        tk.Button(frame, text="💾 Export", bg="#636e72", fg="white", font=("Segoe UI", 8), command=self.export_csv).pack(side=tk.RIGHT)
+        tk.Button(frame, text="📥 Import", bg="#636e72", fg="white", font=("Segoe UI", 8), command=self.import_file).pack(side=tk.RIGHT, padx=5)
 
     def create_task_list(self):
         list_frame = tk.Frame(self.root)
@@ -133,8 +290,7 @@ class TodoApp:
         cols = ("Priority", "Task", "Category", "Due Date", "Status")
         self.tree = ttk.Treeview(list_frame, columns=cols, show="headings", height=12)
         
-        scrollbar = ttk.Scrollbar(list_frame, orient="vertical", command=self.tree.yview)
-        self.tree.configure(yscroll=scrollbar.set)
+        scrollbar = ttk.Scrollbar(list_frame, orient="vertical")
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         
@@ -152,9 +308,18 @@ class TodoApp:
 
         self.tree.bind("<Double-1>", self.open_task_dashboard)
 
+        if LIST_MODE == "virtual":
+            # Only the visible rows exist as Treeview items
+            self.task_view = VirtualTaskList(self.tree, scrollbar, row_height=28)
+        else:
+            scrollbar.configure(command=self.tree.yview)
+            self.tree.configure(yscroll=scrollbar.set)
+            self.task_view = TreeviewSync(self.tree)
+
         self.tree.tag_configure('High', foreground='#d63031', font=("Segoe UI", 10, "bold"))
         self.tree.tag_configure('Completed', foreground='#00b894') 
         self.tree.tag_configure('Overdue', foreground='#e17055', font=("Segoe UI", 10, "bold")) 
+        self.tree.tag_configure('Upcoming', foreground='#b2bec3')
 
         # Footer Area
         btn_frame = tk.Frame(self.root, bg="#2d3436")
@@ -163,60 +328,68 @@ class TodoApp:
         tk.Button(btn_frame, text="📜 View History", bg="#6c5ce7", fg="white", font=("Segoe UI", 11, "bold"), 
                  command=self.show_history, width=20).pack(side=tk.LEFT)
         
-        tk.Label(btn_frame, text="(Double-click task for actions)", bg="#2d3436", fg="#b2bec3", font=("Segoe UI", 9)).pack(side=tk.RIGHT)
+        tk.Button(btn_frame, text="📊 Stats", bg="#0984e3", fg="white", font=("Segoe UI", 11, "bold"),
+                 command=self.show_stats, width=10).pack(side=tk.LEFT, padx=(10, 0))
+
+        tk.Button(btn_frame, text="⏱ Diagnostics", bg="#636e72", fg="white", font=("Segoe UI", 9),
+                 command=self.toggle_diagnostics).pack(side=tk.LEFT, padx=10)
+
+        tk.Label(btn_frame, text="(Double-click task for actions, F12 for diagnostics)", bg="#2d3436", fg="#b2bec3", font=("Segoe UI", 9)).pack(side=tk.RIGHT)
 
     # --- LOGIC ---
 
+    @needs_store
     def add_task(self):
         task_text = self.task_entry.get()
         if not task_text: return
-        date_str = self.date_entry.get_date().strftime("%Y-%m-%d")
+        if self.date_entry is None:
+            self.create_date_entry()
         time_str = f"{self.hour_var.get()}:{self.minute_var.get()} {self.ampm_var.get()}"
         try:
+            date_str = self.date_entry.get_date().strftime("%Y-%m-%d")
             dt_obj = datetime.strptime(f"{date_str} {time_str}", "%Y-%m-%d %I:%M %p")
         except ValueError:
             messagebox.showerror("Error", "Invalid Time")
             return
 
-        new_task = {
-            "task": task_text,
-            "category": self.category_var.get(),
-            "priority": self.priority_var.get(),
-            "datetime": dt_obj.strftime("%Y-%m-%d %H:%M:%S"),
-            "status": "Pending",
-            "last_reminded": None
-        }
-        
+        repeat = self.repeat_var.get().strip()
+        try:
+            repeat = parse_rule(repeat).text if repeat and repeat != "None" else None
+        except ValueError as e:
+            messagebox.showerror("Error", f"Invalid repeat rule: {e}")
+            return
+
+        new_task = Task(task_text, self.category_var.get(), self.priority_var.get(), dt_obj, repeat=repeat)
+
         # Access self.db instead of self.tasks
-        self.db.tasks.append(new_task)
-        self.db.save_data()
-        self.update_listbox()
+        new_task = actions.add(self.db, new_task)
+        self.notifier.reschedule(new_task)
+        self.request_refresh()
         self.task_entry.delete(0, tk.END)
 
+    @needs_store
     def mark_done(self, task_to_complete=None):
         target_task = task_to_complete
         
         if not target_task:
             selected = self.tree.selection()
             if selected:
-                vals = self.tree.item(selected[0])['values']
-                # Search in self.db.tasks
-                target_task = next((t for t in self.db.tasks if t['task'] == vals[1] and t['datetime'] == str(vals[3])), None)
+                # Row iids are task ids (upcoming occurrences point at their series)
+                target_task = self.db.get_task(series_id(selected[0]))
 
         if target_task:
-            target_task['status'] = "Completed"
-            self.db.user_stats["total_completed"] += 1
-            self.check_streak(increment=True)
-            self.db.save_data()
-            self.update_listbox()
+            # Completing an occurrence of a series moves the series to its next occurrence
+            actions.complete(self.db, target_task)
+            self.show_streak()
+            self.notifier.reschedule(target_task)
+            self.request_refresh()
             self.notifier.play_sound("success")
 
+    @needs_store
     def open_task_dashboard(self, event):
         item = self.tree.selection()
         if not item: return
-        vals = self.tree.item(item[0])['values']
-        # Search in self.db.tasks
-        target = next((t for t in self.db.tasks if t['task'] == vals[1] and t['datetime'] == str(vals[3])), None)
+        target = self.db.get_task(series_id(item[0]))
         if not target: return
 
         top = tk.Toplevel(self.root)
@@ -226,22 +399,25 @@ class TodoApp:
         top.resizable(False, False)
 
         tk.Label(top, text="Task Details", font=("Segoe UI", 10), bg="white", fg="gray").pack(pady=(10,0))
-        tk.Label(top, text=target['task'], font=("Segoe UI", 16, "bold"), bg="white", wraplength=380).pack(pady=5)
+        tk.Label(top, text=target.task, font=("Segoe UI", 16, "bold"), bg="white", wraplength=380).pack(pady=5)
 
         badge_frame = tk.Frame(top, bg="white")
         badge_frame.pack(pady=5)
-        pri_color = "#d63031" if target['priority'] == "High" else "#0984e3"
-        tk.Label(badge_frame, text=f" {target['priority']} Priority ", bg=pri_color, fg="white", font=("Segoe UI", 9, "bold")).pack(side=tk.LEFT, padx=5)
-        tk.Label(badge_frame, text=f" {target['category']} ", bg="#636e72", fg="white", font=("Segoe UI", 9)).pack(side=tk.LEFT, padx=5)
+        pri_color = "#d63031" if target.priority == "High" else "#0984e3"
+        tk.Label(badge_frame, text=f" {target.priority} Priority ", bg=pri_color, fg="white", font=("Segoe UI", 9, "bold")).pack(side=tk.LEFT, padx=5)
+        tk.Label(badge_frame, text=f" {target.category} ", bg="#636e72", fg="white", font=("Segoe UI", 9)).pack(side=tk.LEFT, padx=5)
+        rule = rule_for(target)
+        if rule:
+            tk.Label(badge_frame, text=f" ↻ {rule.describe()} ", bg="#6c5ce7", fg="white", font=("Segoe UI", 9)).pack(side=tk.LEFT, padx=5)
 
         time_lbl = tk.Label(top, text="", font=("Segoe UI", 14), bg="white", fg="#2d3436")
         time_lbl.pack(pady=20)
 
         def update_timer():
             try:
-                dt_obj = datetime.strptime(target['datetime'], "%Y-%m-%d %H:%M:%S")
+                dt_obj = target.due
                 now = datetime.now()
-                if target['status'] == "Completed":
+                if target.status == "Completed":
                     time_lbl.config(text="✅ Task Completed", fg="green")
                 elif now > dt_obj:
                     diff = now - dt_obj
@@ -272,11 +448,9 @@ class TodoApp:
 
         def do_snooze(mins):
             try:
-                new_time = datetime.strptime(target['datetime'], "%Y-%m-%d %H:%M:%S") + timedelta(minutes=mins)
-                target['datetime'] = new_time.strftime("%Y-%m-%d %H:%M:%S")
-                target['last_reminded'] = None
-                self.db.save_data()
-                self.update_listbox()
+                actions.snooze(self.db, target, mins)
+                self.notifier.reschedule(target)
+                self.request_refresh()
                 top.destroy()
                 messagebox.showinfo("Snoozed", f"Task snoozed for {mins} minutes.")
             except:
@@ -286,19 +460,20 @@ class TodoApp:
             snooze_menu.add_command(label=f"{m} Mins", command=lambda x=m: do_snooze(x))
         snooze_mb.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=2)
 
+    @needs_store
     def delete_task(self, task_to_delete=None):
         target = task_to_delete
         if not target:
             selected = self.tree.selection()
             if selected:
-                vals = self.tree.item(selected[0])['values']
-                target = next((t for t in self.db.tasks if t['task'] == vals[1] and t['datetime'] == str(vals[3])), None)
+                target = self.db.get_task(series_id(selected[0]))
         
         if target:
-            target['status'] = "Deleted" 
-            self.db.save_data()
-            self.update_listbox()
+            actions.delete(self.db, target)
+            self.notifier.reschedule(target)
+            self.request_refresh()
 
+    @needs_store
     def show_history(self):
         hist_win = tk.Toplevel(self.root)
         hist_win.title("📜 Task History")
@@ -311,17 +486,25 @@ class TodoApp:
         btn_frame.pack(side=tk.BOTTOM, fill=tk.X, pady=10)
         
         def clear_history():
-            if messagebox.askyesno("Confirm", "Permanently delete history?"):
-                # Filter self.db.tasks
-                self.db.tasks = [t for t in self.db.tasks if t['status'] == "Pending"]
-                self.db.save_data()
+            if messagebox.askyesno("Confirm", "Permanently delete history (including the archive)?"):
+                # Drop finished tasks from the store and the archive
+                self.db.clear_history()
+                self.archiver.clear()
+                self.notifier.rebuild()
                 hist_win.destroy()
-                self.update_listbox()
+                self.request_refresh()
 
         tk.Button(btn_frame, text="🗑 Clear All History", bg="#d63031", fg="white", command=clear_history).pack()
 
+        search_frame = tk.Frame(hist_win, bg="#2d3436")
+        search_frame.pack(side=tk.TOP, fill=tk.X, padx=10, pady=(0, 5))
+        tk.Label(search_frame, text="🔍 Search:", bg="#2d3436", fg="white").pack(side=tk.LEFT)
+        query_var = tk.StringVar()
+        tk.Entry(search_frame, textvariable=query_var).pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+
         cols = ("Task", "Date", "Status")
         h_tree = ttk.Treeview(hist_win, columns=cols, show="headings")
+        scrollbar = ttk.Scrollbar(hist_win, orient="vertical", command=h_tree.yview)
         h_tree.heading("Task", text="Task")
         h_tree.heading("Date", text="Original Due Date")
         h_tree.heading("Status", text="Final Status")
@@ -330,52 +513,309 @@ class TodoApp:
         h_tree.column("Date", width=150)
         h_tree.column("Status", width=100)
         
-        h_tree.pack(side=tk.TOP, fill=tk.BOTH, expand=True, padx=10)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y, padx=(0, 10))
+        h_tree.pack(side=tk.TOP, fill=tk.BOTH, expand=True, padx=(10, 0))
 
         h_tree.tag_configure('Completed', foreground='green')
         h_tree.tag_configure('Deleted', foreground='red')
 
-        # Read from self.db.tasks
-        history_items = [t for t in self.db.tasks if t['status'] in ["Completed", "Deleted"]]
-        history_items.sort(key=lambda x: x['datetime'], reverse=True)
-
-        for t in history_items:
-            h_tree.insert("", "end", values=(t['task'], t['datetime'], t['status']), tags=(t['status'],))
-
+        # Recent history from the store, then the archive, newest first;
+        # a page is loaded whenever the user scrolls near the bottom
+        state = {}
+
+        def restart(*args):
+            h_tree.delete(*h_tree.get_children())
+            state.update(history=self.archiver.iter_history(self.db, query_var.get()),
+                         shown=set(), done=False, loading=False)
+            load_page()
+
+        def load_page():
+            if state["done"] or state["loading"]: return
+            state["loading"] = True
+            page = list(itertools.islice(state["history"], HISTORY_PAGE))
+            state["done"] = len(page) < HISTORY_PAGE
+            for t in page:
+                if t.id in state["shown"]: continue
+                state["shown"].add(t.id)
+                h_tree.insert("", "end", iid=t.id, values=(t.task, t.due_str, t.status), tags=(t.status,))
+            state["loading"] = False
+
+        def on_scroll(first, last):
+            scrollbar.set(first, last)
+            if float(last) > 0.9:
+                hist_win.after_idle(load_page)
+
+        h_tree.configure(yscrollcommand=on_scroll)
+        query_var.trace_add("write", restart)
+        restart()
+
+    @needs_store
+    def show_stats(self):
+        """Statistics dashboard; drawn from the per-day counters, never from the task list."""
+        agg = self.db.aggregates
+        win = tk.Toplevel(self.root)
+        win.title("📊 Statistics")
+        win.geometry("720x600")
+        win.configure(bg="#2d3436")
+
+        def heading(text):
+            tk.Label(win, text=text, font=("Segoe UI", 11, "bold"), bg="#2d3436", fg="white").pack(anchor="w", padx=15, pady=(10, 2))
+
+        totals = agg.totals()
+        known = totals[ON_TIME] + totals[OVERDUE]
+        on_time = f"{totals[ON_TIME] / known:.0%}" if known else "n/a"
+        snoozes = sum(b[SNOOZED] for d, b in agg.daily(30))
+        summary = (f"Completed: {totals[COMPLETED]}    Created: {totals[CREATED]}    On time: {on_time}    "
+                   f"Snoozes (30 days): {snoozes}    🔥 Streak: {self.db.user_stats['streak']}")
+        tk.Label(win, text=summary, font=("Segoe UI", 10), bg="#2d3436", fg="#fab1a0").pack(anchor="w", padx=15, pady=(10, 0))
+
+        def bars(values, labels, colors, height=110):
+            # values: one list of stacked counts per bar
+            canvas = tk.Canvas(win, height=height + 20, bg="white", highlightthickness=0)
+            canvas.pack(fill=tk.X, padx=15)
+            win.update_idletasks()
+            width = max(canvas.winfo_width(), 600)
+            top = max([sum(v) for v in values] + [1])
+            step = width / len(values)
+            for i, stack in enumerate(values):
+                y = height
+                for n, color in zip(stack, colors):
+                    h = n / top * (height - 10)
+                    if h:
+                        canvas.create_rectangle(i * step + 2, y - h, (i + 1) * step - 2, y, fill=color, outline="")
+                    y -= h
+                if labels[i]:
+                    canvas.create_text(i * step + step / 2, height + 10, text=labels[i], font=("Segoe UI", 7))
+
+        heading("Completions, last 30 days (green on time, orange overdue, grey unknown)")
+        days = agg.daily(30)
+        bars([[b[ON_TIME], b[OVERDUE], b[COMPLETED] - b[ON_TIME] - b[OVERDUE]] for d, b in days],
+             [d.strftime("%d") if i % 5 == 4 else "" for i, (d, b) in enumerate(days)],
+             ["#00b894", "#e17055", "#b2bec3"])
+
+        heading("Completions per week, last 12 weeks")
+        weeks = agg.weekly(12)
+        bars([[n] for d, n in weeks], [d.strftime("%m/%d") for d, n in weeks], ["#0984e3"], height=80)
+
+        tables = tk.Frame(win, bg="#2d3436")
+        tables.pack(fill=tk.BOTH, expand=True, padx=15, pady=10)
+
+        cols = ("Category", "Completed", "On time", "Overdue")
+        cat_tree = ttk.Treeview(tables, columns=cols, show="headings", height=6)
+        for c in cols:
+            cat_tree.heading(c, text=c)
+            cat_tree.column(c, width=90, anchor="w" if c == "Category" else "e")
+        for cat, (done, ok, late) in sorted(agg.categories.items(), key=lambda kv: -kv[1][0]):
+            rate = f" ({ok / (ok + late):.0%})" if ok + late else ""
+            cat_tree.insert("", "end", values=(cat, done, f"{ok}{rate}", late))
+        cat_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        cols = ("Priority", "Mean time to complete")
+        pri_tree = ttk.Treeview(tables, columns=cols, show="headings", height=6)
+        for c in cols:
+            pri_tree.heading(c, text=c)
+            pri_tree.column(c, width=140)
+        means = agg.mean_completion()
+        for p in ["High", "Normal", "Low"]:
+            if p in means:
+                pri_tree.insert("", "end", values=(p, str(means[p]).split(".")[0]))
+        pri_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(10, 0))
+
+    @perf.timed("update_listbox")
     def update_listbox(self):
-        for item in self.tree.get_children(): self.tree.delete(item)
-        
-        # Read from self.db.tasks
-        active_tasks = [t for t in self.db.tasks if t['status'] != "Deleted"]
-        active_tasks.sort(key=lambda x: (x['status'] == "Completed", x['datetime']))
-
-        for t in active_tasks:
-            if self.filters['category'] != "All" and t['category'] != self.filters['category']: continue
-            if self.filters['priority'] != "All" and t['priority'] != self.filters['priority']: continue
-            
-            tag = t['priority']
+        self.refresh_pending = False
+        if not self.store_ready.is_set():
+            return # Still showing the first screen; on_hydrated refreshes
+        # Filtering and sorting are done by the store (indexed with the SQLite backend);
+        # only the rows that actually changed are touched in the Treeview.
+        # Upcoming occurrences of repeating tasks are generated here, never stored.
+        tasks = self.db.active_tasks(self.filters['category'], self.filters['priority'], self.filters['query'])
+        self.task_view.show(expand(tasks, datetime.now()))
+
+    def toggle_diagnostics(self):
+        """Opens or closes the performance panel."""
+        if self.diag_win is not None:
+            self.diag_win.destroy()
+            self.diag_win = None
+            return
+
+        win = self.diag_win = tk.Toplevel(self.root)
+        win.title("⏱ Diagnostics")
+        win.geometry("760x360")
+        win.configure(bg="#2d3436")
+
+        def on_close():
+            self.diag_win = None
+            win.destroy()
+        win.protocol("WM_DELETE_WINDOW", on_close)
+
+        bar = tk.Frame(win, bg="#2d3436")
+        bar.pack(side=tk.TOP, fill=tk.X, padx=10, pady=10)
+
+        enabled_var = tk.BooleanVar(value=perf.enabled)
+        tk.Checkbutton(bar, text="Record timings", variable=enabled_var, command=lambda: perf.enable(enabled_var.get()),
+                       bg="#2d3436", fg="white", selectcolor="#636e72", activebackground="#2d3436").pack(side=tk.LEFT)
+        tk.Button(bar, text="Reset", command=perf.reset).pack(side=tk.LEFT, padx=5)
+
+        def toggle_capture():
+            if perf.capturing():
+                paths = perf.stop_capture()
+                capture_btn.config(text="● Start profile")
+                messagebox.showinfo("Profile saved", "\n".join(paths), parent=win)
+            else:
+                perf.start_capture()
+                capture_btn.config(text="■ Stop & save profile")
+        capture_btn = tk.Button(bar, text="■ Stop & save profile" if perf.capturing() else "● Start profile", command=toggle_capture)
+        capture_btn.pack(side=tk.RIGHT)
+
+        cols = ("Hook", "Count", "Mean", "Max", "Last", "Histogram")
+        tree = ttk.Treeview(win, columns=cols, show="headings")
+        for c, w in zip(cols, (110, 60, 70, 70, 70, 340)):
+            tree.heading(c, text=c)
+            tree.column(c, width=w, anchor="w" if c in ("Hook", "Histogram") else "e")
+        tree.pack(side=tk.TOP, fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
+
+        labels = [f"≤{b:g}" if b != float("inf") else ">" + f"{perf.BUCKETS_MS[-2]:g}" for b in perf.BUCKETS_MS]
+
+        def refresh():
+            if self.diag_win is not win: return
+            tree.delete(*tree.get_children())
+            for m in sorted(perf.snapshot(), key=lambda m: m.name):
+                last = m.samples[-1][1] if m.samples else 0
+                hist = " ".join(f"{l}:{n}" for l, n in zip(labels, m.buckets) if n)
+                tree.insert("", "end", values=(m.name, m.count, f"{m.mean:.1f} ms", f"{m.max:.1f} ms", f"{last:.1f} ms", hist))
+            win.after(1000, refresh)
+        refresh()
+
+    def show_streak(self):
+        # Update the Label (defined in create_header)
+        self.streak_lbl.config(text=f"🔥 Streak: {self.db.user_stats['streak']} Days")
+
+    @needs_store
+    def import_file(self):
+        """Bulk-imports a CSV/JSON-Lines file on a worker thread, then refreshes once."""
+        from importer import import_tasks
+        path = filedialog.askopenfilename(filetypes=[
+            ("Task files", "*.csv *.jsonl *.json *.gz"), ("All files", "*.*")])
+        if not path: return
+
+        win = tk.Toplevel(self.root)
+        win.title("Importing...")
+        win.configure(bg="white", padx=15, pady=15)
+        status_lbl = tk.Label(win, text="Reading file...", bg="white", font=("Segoe UI", 10))
+        status_lbl.pack()
+
+        def done(result, error):
+            win.destroy()
+            if error:
+                messagebox.showerror("Error", f"Import failed: {error}")
+                return
+            for t in result.added:
+                self.notifier.reschedule(t)
+            self.request_refresh()
+            msg = f"Imported {len(result.added)} tasks, skipped {result.duplicates} duplicates."
+            if result.errors:
+                msg += f"\n\n{len(result.errors)} rows had errors:\n"
+                msg += "\n".join(f"Line {line}: {err}" for line, err in result.errors[:10])
+                if len(result.errors) > 10: msg += "\n..."
+            messagebox.showinfo("Import", msg)
+
+        def run():
+            result, error = None, None
             try:
-                if t['status'] == "Completed": tag = "Completed"
-                elif datetime.now() > datetime.strptime(t['datetime'], "%Y-%m-%d %H:%M:%S"): tag = "Overdue"
-            except:
-                pass
-            
-            self.tree.insert("", "end", values=(t['priority'], t['task'], t['category'], t['datetime'], t['status']), tags=(tag,))
-
-    def check_streak(self, increment=False):
-        today = datetime.now().strftime("%Y-%m-%d")
-        # Access self.db.user_stats
-        if increment and self.db.user_stats.get("last_active_date") != today:
-            self.db.user_stats['streak'] += 1
-            self.db.user_stats['last_active_date'] = today
-            # Update the Label (defined in create_header) if it exists
-            if hasattr(self, 'streak_lbl'):
-                self.streak_lbl.config(text=f"🔥 Streak: {self.db.user_stats['streak']} Days")
+                result = import_tasks(self.db, path, progress=lambda n: self.root.after(0, lambda: status_lbl.config(text=f"{n} rows read")))
+            except Exception as e:
+                error = e
+            self.root.after(0, done, result, error)
 
+        threading.Thread(target=run, daemon=True).start()
+
+    @needs_store
     def export_csv(self):
-        path = filedialog.asksaveasfilename(defaultextension=".csv")
-        if self.db.export_csv(path):
-            messagebox.showinfo("Done", "Exported!")
+        opts = tk.Toplevel(self.root)
+        opts.title("Export Tasks")
+        opts.configure(bg="#2d3436", padx=10, pady=10)
+        opts.resizable(False, False)
+
+        def label(text, row):
+            tk.Label(opts, text=text, bg="#2d3436", fg="white", font=("Segoe UI", 10, "bold")).grid(row=row, column=0, sticky="w", pady=5)
+
+        def check(text, value, row, col):
+            var = tk.BooleanVar(value=value)
+            tk.Checkbutton(opts, text=text, variable=var, bg="#2d3436", fg="white", selectcolor="#636e72",
+                           activebackground="#2d3436").grid(row=row, column=col, sticky="w")
+            return var
+
+        label("Status:", 0)
+        status_vars = {s: check(s, True, 0, i + 1) for i, s in enumerate(["Pending", "Completed", "Deleted"])}
+
+        label("Columns:", 1)
+        column_vars = {c: check(c, c in DEFAULT_COLUMNS, 1 + i // 4, 1 + i % 4) for i, c in enumerate(COLUMNS)}
+
+        # Category follows the filter bar
+        label("Category:", 3)
+        tk.Label(opts, text=self.filters['category'], bg="#2d3436", fg="white").grid(row=3, column=1, sticky="w")
+
+        label("Due from / to:", 4)
+        from_var, to_var = tk.StringVar(), tk.StringVar()
+        tk.Entry(opts, textvariable=from_var, width=12).grid(row=4, column=1, sticky="w")
+        tk.Entry(opts, textvariable=to_var, width=12).grid(row=4, column=2, sticky="w")
+        tk.Label(opts, text="(YYYY-MM-DD, optional)", bg="#2d3436", fg="#b2bec3", font=("Segoe UI", 8)).grid(row=4, column=3, columnspan=2, sticky="w")
+
+        def choose_file():
+            try:
+                start = datetime.strptime(from_var.get().strip(), "%Y-%m-%d") if from_var.get().strip() else None
+                end = datetime.strptime(to_var.get().strip(), "%Y-%m-%d") + timedelta(days=1) if to_var.get().strip() else None
+            except ValueError:
+                messagebox.showerror("Error", "Dates must be YYYY-MM-DD", parent=opts)
+                return
+            path = filedialog.asksaveasfilename(parent=opts, defaultextension=".csv", filetypes=[
+                ("CSV", "*.csv"), ("CSV (gzip)", "*.csv.gz"), ("JSON Lines", "*.jsonl"), ("JSON Lines (gzip)", "*.jsonl.gz")])
+            if not path: return
+            filters = {
+                "statuses": [s for s, v in status_vars.items() if v.get()],
+                "categories": None if self.filters['category'] == "All" else [self.filters['category']],
+                "start": start,
+                "end": end,
+            }
+            columns = [c for c, v in column_vars.items() if v.get()] or DEFAULT_COLUMNS
+            opts.destroy()
+            self.run_export(path, columns, filters)
+
+        tk.Button(opts, text="💾 Export...", bg="#00b894", fg="white", font=("Segoe UI", 9, "bold"),
+                  command=choose_file).grid(row=5, column=0, columnspan=5, pady=(10, 0))
+
+    def run_export(self, path, columns, filters):
+        """Exports on a worker thread with a progress window and a Cancel button."""
+        win = tk.Toplevel(self.root)
+        win.title("Exporting...")
+        win.configure(bg="white", padx=15, pady=15)
+        win.resizable(False, False)
+
+        status_lbl = tk.Label(win, text="Starting...", bg="white", font=("Segoe UI", 10))
+        status_lbl.pack(pady=(0, 5))
+        bar = ttk.Progressbar(win, length=300, mode="determinate")
+        bar.pack()
+
+        def update(written, total):
+            bar.config(maximum=max(total, 1), value=written)
+            status_lbl.config(text=f"{written} / {total} tasks")
+
+        def done(written, error):
+            win.destroy()
+            if error:
+                messagebox.showerror("Error", f"Export failed: {error}")
+            elif written is None:
+                messagebox.showinfo("Cancelled", "Export cancelled.")
+            else:
+                messagebox.showinfo("Done", f"Exported {written} tasks!")
+
+        job = ExportJob(self.db, path, columns, filters,
+                        on_progress=lambda w, t: self.root.after(0, update, w, t),
+                        on_done=lambda w, e: self.root.after(0, done, w, e))
+        tk.Button(win, text="Cancel", command=job.cancel).pack(pady=(10, 0))
+        win.protocol("WM_DELETE_WINDOW", job.cancel)
+        job.start()
 
 if __name__ == "__main__":
     root = tk.Tk()
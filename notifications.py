@@ -1,75 +1,188 @@
+import heapq
+import itertools
+import signal
 import threading
 import time
-import winsound
-from datetime import datetime
+from datetime import datetime, timedelta
 
-# Check for notification support
-try:
-    from plyer import notification
-    NOTIFICATION_AVAILABLE = True
-except ImportError:
-    NOTIFICATION_AVAILABLE = False
+import perf
+import recurrence
+from alerts import Dispatcher
+from locking import Leadership
+
+MAX_SLEEP = 60  # Re-check the clock at least this often (sleep/resume, clock changes)
+LEADER_FILE = "ultimate_tasks.leader"  # Locked by the one process that sends reminders
+LEADER_RETRY = 5  # Seconds between attempts to take over reminders from another process
 
 class ReminderSystem:
-    def __init__(self, task_manager, update_ui_callback):
+    """Sleeps until the earliest reminder and fires it.
+
+    When several processes share the store (windows, the CLI, a daemon),
+    only the one holding LEADER_FILE alerts; the others keep their queue
+    current from the store's change notifications and take over when it exits.
+    """
+
+    def __init__(self, task_manager, update_ui_callback, dispatcher=None, leadership=None):
         self.db = task_manager        # Access to the data
         self.update_ui = update_ui_callback # Function to refresh UI
         self.stop_thread = False
+        # Sounds and notifications run on the dispatcher's thread (see alerts.py)
+        self.alerts = dispatcher or Dispatcher()
+        self.leadership = leadership or Leadership(LEADER_FILE)
+
+        # Pending tasks ordered by next fire time: [fire_time, seq, task]
+        # Replaced entries get their task slot set to None and are skipped lazily.
+        self.cond = threading.Condition()
+        self.heap = []
+        self.entries = {}
+        self.counter = itertools.count()
+        self.rebuild()
 
     def start(self):
         """Starts the background checker thread."""
         self.reminder_thread = threading.Thread(target=self.checker, daemon=True)
         self.reminder_thread.start()
 
+    def stop(self):
+        """Stops the checker thread and wakes it up if it is sleeping."""
+        with self.cond:
+            self.stop_thread = True
+            self.cond.notify()
+        self.alerts.stop()
+        self.leadership.resign()
+
+    def next_fire(self, t):
+        """Returns when the task should next alert, or None if it never will."""
+        if t.status in ["Completed", "Deleted"] or t.due is None:
+            return None # Finished, or a broken date format
+        if t.last_reminded is None:
+            fire = t.due
+        else:
+            interval = 300 if t.priority == "High" else 900
+            fire = max(t.due, t.last_reminded + timedelta(seconds=interval))
+        # A series also wakes up when its next occurrence arrives, even if this one is unfinished
+        nxt = recurrence.next_occurrence(t) if t.repeat else None
+        return min(fire, nxt) if nxt else fire
+
+    def _push(self, t):
+        old = self.entries.pop(t.id, None)
+        if old is not None:
+            old[-1] = None
+        fire = self.next_fire(t)
+        if fire is None:
+            return
+        entry = [fire, next(self.counter), t]
+        self.entries[t.id] = entry
+        heapq.heappush(self.heap, entry)
+
+    def reschedule(self, t):
+        """Re-queues a task after it was added, snoozed, completed or deleted."""
+        self.reschedule_many([t])
+
+    def reschedule_many(self, tasks):
+        with self.cond:
+            for t in tasks:
+                self._push(t)
+            self.cond.notify()
+
+    # Never call the store while holding self.cond: store callers (a batch
+    # transaction, for one) hold the store's lock while they reschedule.
+
+    def rebuild(self):
+        """Rebuilds the queue from scratch (e.g. after the task list was replaced)."""
+        tasks = self.db.pending_tasks()
+        with self.cond:
+            self.heap = []
+            self.entries = {}
+            for t in tasks:
+                self._push(t)
+            self.cond.notify()
+
+    def on_store_changed(self, tasks):
+        """Store listener (see TaskManager.subscribe): another process changed 'tasks',
+        or reloaded everything if tasks is None."""
+        if tasks is None:
+            self.rebuild()
+        else:
+            self.reschedule_many(tasks)
+
+    def _pop_due(self):
+        """Blocks until at least one task is due, then pops all due tasks."""
+        with self.cond:
+            while not self.stop_thread:
+                while self.heap and self.heap[0][-1] is None:
+                    heapq.heappop(self.heap)
+                if not self.heap:
+                    self.cond.wait()
+                    continue
+                wait = (self.heap[0][0] - datetime.now()).total_seconds()
+                if wait <= 0:
+                    break
+                self.cond.wait(min(wait, MAX_SLEEP))
+
+            due = []
+            now = datetime.now()
+            while not self.stop_thread and self.heap and self.heap[0][0] <= now:
+                t = heapq.heappop(self.heap)[-1]
+                if t is not None:
+                    del self.entries[t.id]
+                    due.append(t)
+            return due
+
     def checker(self):
-        """Loop that checks for due tasks."""
+        """Loop that sleeps until the earliest reminder and fires due tasks."""
         while not self.stop_thread:
-            now = datetime.now()
-            changed = False
-            
-            # We iterate over the tasks list located in database.py
-            for t in self.db.tasks:
-                if t['status'] in ["Completed", "Deleted"]: 
-                    continue
-                
-                try:
-                    dt = datetime.strptime(t['datetime'], "%Y-%m-%d %H:%M:%S")
-                    
-                    if now >= dt:
-                        notify = False
-                        
-                        # Logic: Notify if never reminded OR if interval passed
-                        if t['last_reminded'] is None: 
-                            notify = True
-                        else:
-                            last = datetime.strptime(t['last_reminded'], "%Y-%m-%d %H:%M:%S")
-                            interval = 300 if t['priority'] == "High" else 900
-                            if (now - last).total_seconds() > interval: 
-                                notify = True
-                        
-                        if notify:
-                            self.play_sound("alert")
-                            if NOTIFICATION_AVAILABLE:
-                                notification.notify(
-                                    title=f"Due: {t['task']}", 
-                                    message="Task is due!", 
-                                    timeout=5
-                                )
-                            t['last_reminded'] = now.strftime("%Y-%m-%d %H:%M:%S")
-                            changed = True
-                except ValueError:
-                    continue # Skip tasks with broken date formats
-
-            if changed: 
-                self.db.save_data()
-                self.update_ui() # Safe UI update callback
-            
-            time.sleep(2)
+            if not self.leadership.try_lead():
+                # Another process sends the reminders; check back in case it exits
+                with self.cond:
+                    self.cond.wait_for(lambda: self.stop_thread, timeout=LEADER_RETRY)
+                continue
+            due = self._pop_due()
+            if not due:
+                continue
+
+            with perf.Timer("checker"):
+                self.notify_due(due)
+
+    def notify_due(self, due):
+        """Hands the due tasks to the dispatcher and queues their next reminders."""
+        now = datetime.now().replace(microsecond=0)
+        self.alerts.submit(due)
+
+        for t in due:
+            # Unfinished series roll over to their latest occurrence instead of piling up
+            fields = recurrence.rollover_fields(t, now) if t.repeat else {}
+            self.db.update_task(t, last_reminded=now, **fields)
+        self.reschedule_many(due)
+
+        self.update_ui() # Safe UI update callback
 
     def play_sound(self, sound_type):
-        """Plays a system beep."""
-        try: 
-            freq = 2000 if sound_type == "success" else 1000
-            winsound.Beep(freq, 300)
-        except: 
-            pass
\ No newline at end of file
+        """Queues a beep ("alert" or "success"); never blocks the caller."""
+        self.alerts.sound(sound_type)
+
+def stop_on_sigterm():
+    """Makes SIGTERM raise KeyboardInterrupt like Ctrl+C, so a headless process
+    still stops its threads and saves pending writes on the way out."""
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+
+def run_daemon():
+    """Headless scheduler: sends reminders without a window, alongside any number of UIs."""
+    from database import open_task_manager
+    stop_on_sigterm()
+    db = open_task_manager()
+    reminders = ReminderSystem(db, lambda: None)
+    db.subscribe(reminders.on_store_changed)
+    reminders.start()
+    print("Reminder daemon running; Ctrl+C to stop.")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        reminders.stop()
+        db.close()
+
+if __name__ == "__main__":
+    run_daemon()
@@ -0,0 +1,136 @@
+import bisect
+import collections
+import functools
+import os
+import threading
+import time
+
+# Timing is off unless TODO_PERF=1 or the diagnostics window turns it on;
+# when off a hook costs one global lookup.
+enabled = os.environ.get("TODO_PERF") == "1"
+
+BUCKETS_MS = [1, 5, 10, 50, 100, 500, 1000, float("inf")]  # Histogram upper bounds
+RING_SIZE = 100  # Last samples kept per metric
+
+class Metric:
+    __slots__ = ("name", "count", "total", "max", "buckets", "samples")
+
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * len(BUCKETS_MS)
+        self.samples = collections.deque(maxlen=RING_SIZE)  # (wall time, ms)
+
+    def record(self, ms):
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+        self.buckets[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+        self.samples.append((time.time(), ms))
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+metrics = {}
+lock = threading.Lock()
+
+def enable(on=True):
+    global enabled
+    enabled = on
+
+def record(name, seconds):
+    with lock:
+        m = metrics.get(name)
+        if m is None:
+            m = metrics[name] = Metric(name)
+        m.record(seconds * 1000)
+
+def reset():
+    with lock:
+        metrics.clear()
+
+def snapshot():
+    """Returns a copy of the metrics, safe to read from the UI thread."""
+    with lock:
+        out = []
+        for m in metrics.values():
+            c = Metric(m.name)
+            c.count, c.total, c.max, c.buckets = m.count, m.total, m.max, list(m.buckets)
+            c.samples.extend(m.samples)
+            out.append(c)
+        return out
+
+def timed(name):
+    """Decorator recording the call's duration under 'name' while timing is enabled."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+class Timer:
+    """Context manager version of timed() for code that isn't a whole function."""
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter() if enabled else None
+        return self
+
+    def __exit__(self, *exc):
+        if self.start is not None:
+            record(self.name, time.perf_counter() - self.start)
+
+# --- PROFILE CAPTURE ---
+
+_profiler = None
+
+def capturing():
+    return _profiler is not None
+
+def start_capture():
+    """Starts cProfile (on the calling thread) and tracemalloc."""
+    global _profiler
+    import cProfile
+    import tracemalloc
+    if _profiler is None:
+        tracemalloc.start()
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+
+def stop_capture(directory="."):
+    """Stops the capture and writes todo_profile_<time>.prof and todo_memory_<time>.txt.
+
+    Returns the two paths. Open the .prof file with pstats or snakeviz.
+    """
+    global _profiler
+    import tracemalloc
+    if _profiler is None:
+        return None
+    _profiler.disable()
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    prof_path = os.path.join(directory, f"todo_profile_{stamp}.prof")
+    mem_path = os.path.join(directory, f"todo_memory_{stamp}.txt")
+    _profiler.dump_stats(prof_path)
+    _profiler = None
+
+    snap = tracemalloc.take_snapshot()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    with open(mem_path, "w", encoding="utf-8") as f:
+        f.write(f"current {current / 1e6:.1f} MB, peak {peak / 1e6:.1f} MB\n\n")
+        for stat in snap.statistics("lineno")[:50]:
+            f.write(f"{stat}\n")
+    return prof_path, mem_path
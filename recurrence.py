@@ -0,0 +1,230 @@
+import functools
+import heapq
+import os
+import re
+from datetime import datetime, timedelta
+
+from task import Task
+
+HORIZON_DAYS = int(os.environ.get("TODO_RECUR_HORIZON", "7"))  # How far ahead the list shows occurrences
+MAX_UPCOMING = 20  # Upcoming rows shown per series (keeps hourly series from flooding the list)
+
+FREQS = {"HOURLY": timedelta(hours=1), "DAILY": timedelta(days=1), "WEEKLY": timedelta(weeks=1)}
+DAYS = ["MO", "TU", "WE", "TH", "FR", "SA", "SU"]
+DAY_NAMES = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+UNITS = {"hour": "HOURLY", "day": "DAILY", "week": "WEEKLY"}
+PRESETS = {
+    "hourly": "FREQ=HOURLY",
+    "daily": "FREQ=DAILY",
+    "weekdays": "FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR",
+    "weekly": "FREQ=WEEKLY",
+}
+
+class Rule:
+    """A repeat rule: FREQ (HOURLY, DAILY, WEEKLY), INTERVAL, BYDAY and UNTIL.
+
+    A series is stored as one task whose due date is its current occurrence;
+    the rule turns that into the next (or latest) occurrence arithmetically,
+    so advancing never walks through every occurrence in between.
+    """
+    __slots__ = ("freq", "interval", "byday", "until")
+
+    def __init__(self, freq, interval=1, byday=(), until=None):
+        self.freq = freq
+        self.interval = interval
+        self.byday = tuple(sorted(byday))  # Weekday numbers, Monday = 0
+        self.until = until
+
+    @property
+    def text(self):
+        """Canonical RRULE-style form, as saved on the task."""
+        parts = [f"FREQ={self.freq}"]
+        if self.interval != 1:
+            parts.append(f"INTERVAL={self.interval}")
+        if self.byday:
+            parts.append("BYDAY=" + ",".join(DAYS[d] for d in self.byday))
+        if self.until:
+            parts.append(f"UNTIL={self.until:%Y%m%dT%H%M%S}")
+        return ";".join(parts)
+
+    def describe(self):
+        """Short label for the UI, e.g. 'Every 2 hours' or 'Weekdays'."""
+        unit = {"HOURLY": "hour", "DAILY": "day", "WEEKLY": "week"}[self.freq]
+        if self.byday == (0, 1, 2, 3, 4) and self.interval == 1:
+            out = "Weekdays"
+        else:
+            out = f"Every {unit}" if self.interval == 1 else f"Every {self.interval} {unit}s"
+            if self.byday:
+                out += " on " + ", ".join(DAY_NAMES[d] for d in self.byday)
+        if self.until:
+            out += f" until {self.until:%Y-%m-%d}"
+        return out
+
+    def _matches(self, anchor, day):
+        if day.weekday() not in self.byday:
+            return False
+        if self.freq == "WEEKLY":
+            week0 = anchor.date() - timedelta(days=anchor.weekday())
+            return (day - week0).days // 7 % self.interval == 0
+        return (day - anchor.date()).days % self.interval == 0
+
+    def _scan(self, anchor, when, forward):
+        """Day-by-day search for BYDAY rules; the pattern repeats within 7 * interval days."""
+        for i in range(7 * self.interval + 1):
+            day = when.date() + timedelta(days=i if forward else -i)
+            due = datetime.combine(day, anchor.time())
+            if not forward and due < anchor:
+                return anchor
+            if (due > when if forward else due <= when) and self._matches(anchor, day):
+                return due
+        return None
+
+    def next_after(self, anchor, when):
+        """First occurrence of the series at 'anchor' later than 'when', or None once the rule has ended."""
+        if when < anchor:
+            due = anchor
+        elif self.byday:
+            due = self._scan(anchor, when, True)
+        else:
+            step = FREQS[self.freq] * self.interval
+            due = anchor + ((when - anchor) // step + 1) * step
+        if due is None or (self.until and due > self.until):
+            return None
+        return due
+
+    def latest(self, anchor, when):
+        """Last occurrence of the series at 'anchor' no later than 'when' (at least anchor)."""
+        if self.until and when > self.until:
+            when = self.until
+        if when <= anchor:
+            return anchor
+        if self.byday:
+            return self._scan(anchor, when, False)
+        step = FREQS[self.freq] * self.interval
+        return anchor + ((when - anchor) // step) * step
+
+@functools.lru_cache(maxsize=256)
+def parse_rule(text):
+    """Parses a preset ('daily', 'weekdays', 'every 4 hours', ...) or an RRULE string.
+
+    Raises ValueError for anything unsupported.
+    """
+    text = text.strip()
+    if text.lower() in PRESETS:
+        text = PRESETS[text.lower()]
+    m = re.fullmatch(r"every\s+(\d+)\s+(hour|day|week)s?", text, re.IGNORECASE)
+    if m:
+        text = f"FREQ={UNITS[m.group(2).lower()]};INTERVAL={m.group(1)}"
+    if text.upper().startswith("RRULE:"):
+        text = text[6:]
+
+    fields = {}
+    for part in text.split(";"):
+        key, sep, value = part.partition("=")
+        if not sep:
+            raise ValueError(f"unknown repeat rule '{text}'")
+        fields[key.strip().upper()] = value.strip().upper()
+
+    freq = fields.pop("FREQ", None)
+    if freq not in FREQS:
+        raise ValueError(f"FREQ must be one of {', '.join(FREQS)}")
+    try:
+        interval = int(fields.pop("INTERVAL", "1"))
+    except ValueError:
+        raise ValueError("INTERVAL must be a number")
+    if interval < 1:
+        raise ValueError("INTERVAL must be at least 1")
+    byday = []
+    if "BYDAY" in fields:
+        if freq == "HOURLY":
+            raise ValueError("BYDAY needs FREQ=DAILY or FREQ=WEEKLY")
+        for d in fields.pop("BYDAY").split(","):
+            if d not in DAYS:
+                raise ValueError(f"unknown day '{d}' in BYDAY")
+            byday.append(DAYS.index(d))
+    until = None
+    if "UNTIL" in fields:
+        value = fields.pop("UNTIL").rstrip("Z")
+        try:
+            until = datetime.strptime(value, "%Y%m%dT%H%M%S") if "T" in value else datetime.strptime(value, "%Y%m%d").replace(hour=23, minute=59, second=59)
+        except ValueError:
+            raise ValueError("UNTIL must be YYYYMMDD or YYYYMMDDTHHMMSS")
+    if fields:
+        raise ValueError(f"unsupported repeat option {', '.join(fields)}")
+    return Rule(freq, interval, set(byday), until)
+
+def rule_for(t):
+    """The task's repeat rule, or None for one-off tasks (or a rule that no longer parses)."""
+    if not t.repeat:
+        return None
+    try:
+        return parse_rule(t.repeat)
+    except ValueError:
+        return None
+
+def anchor(t):
+    """The scheduled time of the series' current occurrence (its due date unless snoozed)."""
+    return t.slot or t.due
+
+def next_occurrence(t):
+    """When the series moves past its current occurrence, or None."""
+    rule = rule_for(t)
+    if rule is None or t.due is None:
+        return None
+    return rule.next_after(anchor(t), anchor(t))
+
+def complete_fields(t, now):
+    """update_task fields for completing the current occurrence of a series.
+
+    The series moves to its next occurrence after 'now' (occurrences missed
+    while overdue are skipped) or is completed once the rule has ended.
+    """
+    rule = rule_for(t)
+    due = rule.next_after(anchor(t), max(t.due, now)) if rule and t.due else None
+    if due is None:
+        return {"status": "Completed"}
+    return {"due": due, "last_reminded": None, "slot": None}
+
+def rollover_fields(t, now):
+    """update_task fields that move an unfinished series to its latest occurrence by 'now'."""
+    rule = rule_for(t)
+    if rule is None or t.due is None:
+        return {}
+    due = rule.latest(anchor(t), now)
+    return {"due": due, "slot": None} if due > t.due else {}
+
+def series_id(iid):
+    """Task id behind a list row (upcoming occurrence rows are '<series id>@<time>')."""
+    return iid.partition("@")[0]
+
+def occurrences(t, end, limit=MAX_UPCOMING):
+    """Upcoming occurrences of a series after its current one, up to 'end', as display-only tasks."""
+    rule = rule_for(t)
+    out = []
+    due = start = anchor(t)
+    while rule and due is not None and len(out) < limit:
+        due = rule.next_after(start, due)
+        if due is None or due > end:
+            break
+        out.append(Task(t.task, t.category, t.priority, due, "Upcoming",
+                        id=f"{t.id}@{due:%Y%m%d%H%M}", repeat=t.repeat))
+    return out
+
+def expand(tasks, now, days=HORIZON_DAYS):
+    """Merges the upcoming occurrences of pending series (up to 'days' ahead) into an active_tasks list.
+
+    Nothing is stored; rows are generated per refresh and only for series.
+    """
+    end = now + timedelta(days=days)
+    upcoming = []
+    split = len(tasks)
+    for i, t in enumerate(tasks):
+        if t.status == "Completed":
+            split = i
+            break
+        if t.repeat:
+            upcoming.extend(occurrences(t, end))
+    if not upcoming:
+        return tasks
+    upcoming.sort(key=lambda t: t.sort_key)
+    return list(heapq.merge(tasks[:split], upcoming, key=lambda t: t.sort_key)) + tasks[split:]
@@ -0,0 +1,263 @@
+import bisect
+import re
+import threading
+from itertools import compress
+from operator import attrgetter
+
+TOKEN_RE = re.compile(r"\w+")
+SORT_HITS_BELOW = 1 / 16  # Searches hitting less than this share of a SortedTasks sort the hits instead of scanning it
+PREFIX_CACHE = 8          # Unions of many tokens' ids kept for recently typed prefixes
+
+def tokenize(text):
+    """Lower-cased word tokens of a task title or a search query."""
+    return TOKEN_RE.findall(text.casefold())
+
+def matches(query_tokens, text):
+    """True if every query token is a prefix of some word in 'text' (what the index answers, without it)."""
+    words = tokenize(text)
+    return all(any(w.startswith(q) for w in words) for q in query_tokens)
+
+def narrows(old, new):
+    """True if everything matching query 'new' also matches 'old' (each old token prefixes a new one)."""
+    new_words = tokenize(new)
+    return all(any(w.startswith(o) for w in new_words) for o in tokenize(old))
+
+def keep(rows, ids):
+    """The rows whose id is in 'ids', in order (the loop runs in C)."""
+    return list(compress(rows, map(ids.__contains__, map(attrgetter("id"), rows))))
+
+class SortedTasks:
+    """The tasks passing 'include', kept sorted by 'key' while they change.
+
+    The store reports the ids every change touches (touch()); the next read
+    takes those rows out and puts them back by binary search, so a change
+    doesn't cost a full sort. Rows are filed under (key, id), and the ids are
+    kept in a parallel list so filtering by a search doesn't touch every
+    task. Lists handed out are never modified.
+    """
+
+    def __init__(self, key, include):
+        self.key = key
+        self.include = include
+        self.reset()
+
+    def reset(self):
+        self.rows = None   # Sorted tasks, or None to sort again on the next read
+        self.ids = []      # Their ids, in the same order
+        self.keys = []     # Their (key, id), in the same order
+        self.key_of = {}   # id -> (key, id) its row is filed under
+        self.dirty = set()
+
+    def touch(self, ids):
+        if self.rows is not None:
+            self.dirty.update(ids)
+
+    def get(self, tasks, index, ids=None):
+        """The sorted tasks, or only those whose id is in 'ids'.
+
+        'tasks' are all of the store's tasks and 'index' maps id -> task.
+        Caller holds the store's lock.
+        """
+        if self.rows is not None and len(self.dirty) * 8 > len(self.rows):
+            self.rows = None # Cheaper to sort again
+        if self.rows is None:
+            self.keys = sorted((self.key(t), t.id) for t in tasks if self.include(t))
+            self.ids = [i for k, i in self.keys]
+            self.rows = [index[i] for i in self.ids]
+            self.key_of = dict(zip(self.ids, self.keys))
+        elif self.dirty:
+            self._patch(index)
+        self.dirty = set()
+        if ids is None:
+            return self.rows
+        if len(ids) < SORT_HITS_BELOW * len(self.rows):
+            return [index[i] for k, i in sorted(filter(None, map(self.key_of.get, ids)))]
+        return list(compress(self.rows, map(ids.__contains__, self.ids)))
+
+    def _patch(self, index):
+        rows, keys = self.rows[:], self.keys
+        for task_id in self.dirty:
+            old = self.key_of.pop(task_id, None)
+            if old is not None:
+                i = bisect.bisect_left(keys, old)
+                del rows[i], keys[i], self.ids[i]
+            t = index.get(task_id)
+            if t is not None and self.include(t):
+                k = self.key_of[task_id] = (self.key(t), task_id)
+                i = bisect.bisect_left(keys, k)
+                rows.insert(i, t)
+                keys.insert(i, k)
+                self.ids.insert(i, task_id)
+        self.rows = rows
+
+class ResultCache:
+    """Keeps the store's last unfiltered and last searched result lists, keyed by
+    (store version, filters).
+
+    As the user types, a query usually narrows an earlier one, so its result
+    is that (already sorted) list minus the rows the index rules out. Paging
+    through an unchanged list reuses it as is.
+    """
+
+    def __init__(self):
+        self.base = None  # (key, "", rows)
+        self.last = None  # (key, query, rows)
+
+    def lookup(self, key, query, match, exact=False):
+        """Rows for 'query' derived from a cached list, or None if none applies.
+
+        An empty query gets the cached unfiltered list itself, so callers
+        must not modify the rows they get. With 'exact', only a list for the
+        same query is reused (for callers with a faster way to narrow).
+        """
+        for entry in (self.last, self.base):
+            if not entry or entry[0] != key:
+                continue
+            if entry[1] == query:
+                return entry[2]
+            if not exact and narrows(entry[1], query):
+                ids = match(query)
+                if ids is None:
+                    return entry[2]
+                return keep(entry[2], ids)
+        return None
+
+    def store(self, key, query, rows):
+        self.last = (key, query, rows)
+        if not query:
+            self.base = self.last
+
+class SearchIndex:
+    """Inverted index over task titles: token -> ids, plus a sorted token list for prefixes.
+
+    Every query token is treated as a prefix, so results narrow as the user
+    types. The index is built from 'source' (a callable returning (id, text)
+    pairs) on a background thread, started by build_async() or the first
+    search, and kept up to date by the store after that; until it is ready
+    match() scans the source, so no keystroke waits for the build.
+    Callers hold the store's lock, which is passed in as 'lock'.
+    """
+
+    def __init__(self, source, lock=None):
+        self.source = source
+        self.lock = lock or threading.RLock()
+        self.built = False
+        self.building = None  # While a build runs: the (id, text or None) changes it has to catch up on
+        self.generation = 0   # Bumped by reset(), so a build of older data is thrown away
+        self.postings = {}  # token -> set of task ids
+        self.tokens = []    # Sorted distinct tokens; a prefix is a contiguous range
+        self.docs = {}      # task id -> its tokens, for removal
+        self.prefixes = {}  # prefix -> ids of its tokens, for the last PREFIX_CACHE prefixes spanning several
+
+    def reset(self):
+        """Drops the index; it is rebuilt from the source after the next search."""
+        self.built = False
+        self.building = None
+        self.generation += 1
+        self.postings = {}
+        self.tokens = []
+        self.docs = {}
+        self.prefixes = {}
+
+    def build_async(self):
+        """Starts building the index on a daemon thread unless it is built or being built."""
+        with self.lock:
+            if self.built or self.building is not None:
+                return
+            self.building = []
+            generation = self.generation
+        threading.Thread(target=self._build, args=(generation,), daemon=True).start()
+
+    def _build(self, generation):
+        # Only reading the source needs the lock; tokenizing happens without it
+        with self.lock:
+            if generation != self.generation:
+                return
+            pairs = list(self.source())
+        fresh = SearchIndex(None)
+        for task_id, text in pairs:
+            fresh._add(task_id, text)
+        fresh.tokens = sorted(fresh.postings)
+        fresh.built = True
+        with self.lock:
+            if generation != self.generation:
+                return
+            for task_id, text in self.building:
+                if text is None:
+                    fresh.discard(task_id)
+                else:
+                    fresh.add(task_id, text)
+            self.postings, self.tokens, self.docs = fresh.postings, fresh.tokens, fresh.docs
+            self.prefixes = {}
+            self.building = None
+            self.built = True
+
+    def _add(self, task_id, text):
+        words = set(tokenize(text or ""))
+        self.docs[task_id] = words
+        for w in words:
+            ids = self.postings.get(w)
+            if ids is None:
+                ids = self.postings[w] = set()
+                if self.built:
+                    bisect.insort(self.tokens, w)
+            ids.add(task_id)
+        for prefix, ids in self.prefixes.items():
+            if any(w.startswith(prefix) for w in words):
+                ids.add(task_id)
+
+    def add(self, task_id, text):
+        """Indexes a new task, or re-indexes one whose text changed."""
+        if not self.built:
+            if self.building is not None:
+                self.building.append((task_id, text or ""))
+            return
+        self.discard(task_id)
+        self._add(task_id, text)
+
+    def discard(self, task_id):
+        if not self.built:
+            if self.building is not None:
+                self.building.append((task_id, None))
+            return
+        words = self.docs.pop(task_id, ())
+        for prefix, ids in self.prefixes.items():
+            if any(w.startswith(prefix) for w in words):
+                ids.discard(task_id)
+        for w in words:
+            ids = self.postings[w]
+            ids.discard(task_id)
+            if not ids:
+                del self.postings[w]
+                del self.tokens[bisect.bisect_left(self.tokens, w)]
+
+    def _prefix(self, prefix):
+        """Ids of tasks with a word starting with 'prefix'."""
+        lo = bisect.bisect_left(self.tokens, prefix)
+        hi = bisect.bisect_left(self.tokens, prefix + "\U0010ffff")
+        if hi - lo == 1:
+            return self.postings[self.tokens[lo]]
+        out = self.prefixes.get(prefix)
+        if out is None:
+            out = set()
+            for w in self.tokens[lo:hi]:
+                out.update(self.postings[w])
+            if len(self.prefixes) >= PREFIX_CACHE:
+                del self.prefixes[next(iter(self.prefixes))]
+            self.prefixes[prefix] = out
+        return out
+
+    def match(self, query):
+        """Ids of tasks matching every token of 'query', or None for an empty query."""
+        words = tokenize(query)
+        if not words:
+            return None
+        if not self.built:
+            self.build_async()
+            # A word prefix is also a substring: the cheap test rules out most titles
+            return {task_id for task_id, text in self.source()
+                    if text and all(w in text.casefold() for w in words) and matches(words, text)}
+        found = sorted((self._prefix(w) for w in set(words)), key=len)
+        if not found[0]:
+            return set()
+        return found[0].intersection(*found[1:])
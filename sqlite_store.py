@@ -0,0 +1,442 @@
+import contextlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import weakref
+from datetime import datetime
+
+import perf
+from database import DATA_FILE, JOURNAL_FILE, WATCH_INTERVAL, StoreBase, TaskManager, default_stats
+from search import ResultCache, SearchIndex
+from stats import Aggregates, count_completion
+from task import Task, format_dt
+
+DB_FILE = "ultimate_tasks.db"
+COLUMNS = ["id", "task", "category", "priority", "datetime", "status", "last_reminded", "repeat", "created", "slot"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT,
+    task TEXT NOT NULL,
+    category TEXT,
+    priority TEXT,
+    datetime TEXT,
+    status TEXT,
+    last_reminded TEXT,
+    repeat TEXT,
+    created TEXT,
+    slot TEXT
+);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS changes (seq INTEGER PRIMARY KEY AUTOINCREMENT, id TEXT, writer TEXT);
+"""
+
+# Per-connection (TEMP) triggers that log every row this process writes, tagged
+# with its token, so other processes re-read just those rows (see sync())
+CHANGE_TRIGGERS = """
+CREATE TEMP TRIGGER log_insert AFTER INSERT ON main.tasks BEGIN INSERT INTO changes (id, writer) VALUES (new.id, '{writer}'); END;
+CREATE TEMP TRIGGER log_update AFTER UPDATE ON main.tasks BEGIN INSERT INTO changes (id, writer) VALUES (new.id, '{writer}'); END;
+CREATE TEMP TRIGGER log_delete AFTER DELETE ON main.tasks BEGIN INSERT INTO changes (id, writer) VALUES (old.id, '{writer}'); END;
+"""
+CHANGES_KEEP = 10000  # Change log rows kept; a process further behind than this reloads
+PRUNE_INTERVAL = 60   # Seconds between trims of the change log by the watcher thread
+
+SEARCH_IN_LIMIT = 500  # Search hits up to this many are fetched by id; more filter the normal query
+
+INDEXES = """
+CREATE UNIQUE INDEX IF NOT EXISTS idx_tasks_id ON tasks(id);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status, datetime);
+CREATE INDEX IF NOT EXISTS idx_tasks_category ON tasks(category, status, datetime);
+CREATE INDEX IF NOT EXISTS idx_tasks_priority ON tasks(priority, status, datetime);
+"""
+
+class SQLiteTaskManager(StoreBase):
+    """Drop-in replacement for TaskManager that keeps tasks in an indexed SQLite file.
+
+    Only the rows a query asks for are loaded. The same row always maps to the
+    same Task object while it is alive, so the UI and the reminder thread
+    see each other's changes just like with the in-memory store.
+
+    Other processes may use the same file: SQLite serializes the writes
+    (each one only sets the columns it changed), and a watcher thread
+    refreshes the rows they touched when PRAGMA data_version moves.
+    """
+
+    def __init__(self, path=DB_FILE):
+        super().__init__()
+        self.path = path
+        self.lock = threading.RLock()
+        self.rows = weakref.WeakValueDictionary()  # task id -> Task
+        self.search = SearchIndex(lambda: self.conn.execute("SELECT id, task FROM tasks"), self.lock)
+        self.version = 0        # Bumped on every change; invalidates cached results
+        self.results = ResultCache()
+        self.history = ResultCache()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA busy_timeout=5000")  # Wait for other processes' writes
+        self.conn.executescript(SCHEMA)
+        # Databases created before task ids (or repeat rules, creation times, snoozed slots) get the new columns once
+        existing = [c[1] for c in self.conn.execute("PRAGMA table_info(tasks)")]
+        for column in ("id", "repeat", "created", "slot"):
+            if column not in existing:
+                self.conn.execute(f"ALTER TABLE tasks ADD COLUMN {column} TEXT")
+        self.conn.execute("UPDATE tasks SET id = lower(hex(randomblob(16))) WHERE id IS NULL")
+        self.conn.executescript(INDEXES)
+        self.writer = uuid.uuid4().hex
+        self.conn.executescript(CHANGE_TRIGGERS.format(writer=self.writer))
+        self.load_data()
+        self.closed = threading.Event()
+        self.watcher = threading.Thread(target=self._watch, daemon=True)
+        self.watcher.start()
+
+    # --- HELPERS ---
+
+    def _row(self, r):
+        t = self.rows.get(r[0])
+        if t is None:
+            t = Task.from_dict(dict(zip(COLUMNS, r)))
+            self.rows[r[0]] = t
+        return t
+
+    def _select(self, where="1", params=(), order="datetime"):
+        sql = f"SELECT {', '.join(COLUMNS)} FROM tasks WHERE {where} ORDER BY {order}"
+        with self.lock:
+            return [self._row(r) for r in self.conn.execute(sql, params)]
+
+    def _get_meta(self, key):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _set_meta(self, key, value):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+
+    @contextlib.contextmanager
+    def _atomic(self):
+        """Runs the block in one transaction, rolled back if it raises (or as part of
+        the transaction already open, see transaction())."""
+        with self.lock:
+            if self.conn.in_transaction:
+                yield
+                return
+            self.conn.execute("BEGIN")
+            try:
+                yield
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+
+    def migrate_json(self):
+        """One-shot import of the JSON store (snapshot + journal). The JSON files are left in place."""
+        if self._get_meta("migrated") is not None:
+            return
+        if not (os.path.exists(DATA_FILE) or os.path.exists(JOURNAL_FILE)):
+            self._set_meta("migrated", "")
+            return
+        old = TaskManager()
+        old.close()
+        with self._atomic():
+            self.conn.executemany(
+                f"INSERT INTO tasks ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                ([t.to_dict()[c] for c in COLUMNS] for t in old.tasks))
+            self._set_meta("stats", old.user_stats)
+            self._set_meta("aggregates", old.aggregates.to_dict())
+            self._set_meta("migrated", DATA_FILE)
+
+    # --- TaskManager interface ---
+
+    @property
+    def tasks(self):
+        """All tasks. Prefer the query methods; this reads the whole table."""
+        return self._select(order="rowid")
+
+    def add_task(self, task):
+        with self.lock:
+            d = task.to_dict()
+            try:
+                self.conn.execute(
+                    f"INSERT INTO tasks ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                    [d[c] for c in COLUMNS])
+            except sqlite3.IntegrityError:
+                raise ValueError(f"a task with id '{task.id}' already exists") from None
+            self.rows[task.id] = task
+            self.search.add(task.id, task.task)
+            self.version += 1
+            return task
+
+    def bulk_add(self, tasks):
+        """Adds many tasks in one transaction, skipping existing ids and (text, due date) pairs."""
+        with self.lock:
+            ids = set()
+            keys = set()
+            for tid, text, due in self.conn.execute("SELECT id, task, datetime FROM tasks"):
+                ids.add(tid)
+                keys.add((text, due))
+            added = []
+            for t in tasks:
+                key = (t.task, t.due_str)
+                if t.id in ids or key in keys:
+                    continue
+                ids.add(t.id)
+                keys.add(key)
+                added.append(t)
+
+            with self._atomic():
+                self.conn.executemany(
+                    f"INSERT INTO tasks ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                    ([t.to_dict()[c] for c in COLUMNS] for t in added))
+            for t in added:
+                self.rows[t.id] = t
+                self.search.add(t.id, t.task)
+            self.version += 1
+            return added
+
+    def update_task(self, task, /, **fields):
+        with self.lock:
+            self.version += 1
+            task.update(**fields)
+            saved = Task.saved_fields(fields)
+            sets = ", ".join(f"{k} = ?" for k in saved)
+            self.conn.execute(f"UPDATE tasks SET {sets} WHERE id = ?", [*saved.values(), task.id])
+            if "task" in fields:
+                self.search.add(task.id, task.task)
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """Groups several single-row changes into one commit instead of one each."""
+        with self.lock:
+            if self.conn.in_transaction:
+                yield
+                return
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            finally:
+                self.conn.execute("COMMIT") # Changes are already applied to the Task objects
+
+    def tally(self, kind, task, now=None):
+        """Counts a task transition in the aggregates and user stats (see stats.Aggregates).
+
+        The counters are re-read inside the write transaction when another
+        process committed since, so concurrent completions add up.
+        """
+        with self.transaction():
+            version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+            if version != self.stats_version:
+                self._read_stats(version)
+            record = Aggregates.event(kind, task, now or datetime.now())
+            self.aggregates.apply(record)
+            count_completion(self.user_stats, record)
+            self._set_meta("aggregates", self.aggregates.to_dict())
+            self._set_meta("stats", self.user_stats)
+
+    def _read_stats(self, version):
+        self.user_stats = self._get_meta("stats") or default_stats()
+        self.aggregates = Aggregates(self._get_meta("aggregates"))
+        self.stats_version = version
+
+    def clear_history(self):
+        with self.lock:
+            self.conn.execute("DELETE FROM tasks WHERE status IN ('Completed', 'Deleted')")
+            for t in list(self.rows.values()):
+                if t.status in ("Completed", "Deleted"):
+                    del self.rows[t.id]
+            self.search.reset()
+            self.version += 1
+
+    def remove_tasks(self, tasks):
+        with self._atomic():
+            self.conn.executemany("DELETE FROM tasks WHERE id = ?", ((t.id,) for t in tasks))
+            for t in tasks:
+                self.rows.pop(t.id, None)
+                self.search.discard(t.id)
+            self.version += 1
+
+    @perf.timed("save_data")
+    def save_data(self):
+        """Nothing to do; every change is committed as it happens."""
+
+    def flush(self):
+        """Nothing is buffered; every change is committed as it happens."""
+
+    def close(self):
+        self.closed.set()
+        self.watcher.join()
+        with self.lock:
+            self.conn.close()
+
+    @perf.timed("load_data")
+    def load_data(self):
+        with self.lock:
+            self.migrate_json()
+            self.rows = weakref.WeakValueDictionary()
+            self.search.reset()
+            self.version += 1
+            if self._get_meta("aggregates") is None:
+                # Store from before the stats engine: seed it from the completed tasks once
+                aggregates = Aggregates()
+                aggregates.backfill(self._select("status = 'Completed'"))
+                self._set_meta("aggregates", aggregates.to_dict())
+            self.data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+            self._read_stats(self.data_version)
+            self.change_seq = self.conn.execute("SELECT MAX(seq) FROM changes").fetchone()[0] or 0
+            self._prune_changes()
+
+    # --- CHANGES FROM OTHER PROCESSES ---
+
+    def sync(self):
+        """Re-reads the rows other processes changed since the last look and tells the subscribers."""
+        with self.lock:
+            version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+            if version == self.data_version:
+                return
+            self.data_version = version
+            changed = self._catch_up()
+        self._notify(changed)
+
+    def _catch_up(self):
+        """Refreshes stats and the changed rows' Task objects; returns the tasks, or None
+        if this process fell too far behind and dropped everything it had loaded."""
+        self._read_stats(self.data_version)
+        self.version += 1
+        first, last = self.conn.execute("SELECT MIN(seq), MAX(seq) FROM changes").fetchone()
+        if last is None or last <= self.change_seq:
+            return []
+        if first > self.change_seq + 1:
+            self.rows = weakref.WeakValueDictionary()
+            self.search.reset()
+            self.change_seq = last
+            return None
+
+        ids = list({r[0] for r in self.conn.execute(
+            "SELECT id FROM changes WHERE seq > ? AND seq <= ? AND writer != ?", (self.change_seq, last, self.writer))})
+        self.change_seq = last
+
+        changed = []
+        for i in range(0, len(ids), SEARCH_IN_LIMIT):
+            chunk = ids[i:i + SEARCH_IN_LIMIT]
+            sql = f"SELECT {', '.join(COLUMNS)} FROM tasks WHERE id IN ({', '.join('?' * len(chunk))})"
+            for r in self.conn.execute(sql, chunk):
+                t = self.rows.get(r[0])
+                if t is None:
+                    t = self._row(r)
+                else:
+                    t._set_saved(dict(zip(COLUMNS, r)))
+                changed.append(t)
+        found = {t.id for t in changed}
+        for task_id in ids:
+            if task_id in found:
+                self.search.add(task_id, self.rows[task_id].task)
+            else:
+                self.rows.pop(task_id, None) # Deleted
+                self.search.discard(task_id)
+        return changed
+
+    def _prune_changes(self):
+        """Trims the change log to its last CHANGES_KEEP rows, whoever wrote them."""
+        with self.lock:
+            first, last = self.conn.execute("SELECT MIN(seq), MAX(seq) FROM changes").fetchone()
+            if last is not None and last - first >= CHANGES_KEEP:
+                self.conn.execute("DELETE FROM changes WHERE seq <= ?", (last - CHANGES_KEEP,))
+
+    def _watch(self):
+        """Watcher thread: PRAGMA data_version only changes when another connection commits.
+        It also keeps the change log short, even when no other process reads it."""
+        next_prune = time.monotonic() + PRUNE_INTERVAL
+        while not self.closed.wait(WATCH_INTERVAL):
+            try:
+                self.sync()
+                if time.monotonic() >= next_prune:
+                    next_prune = time.monotonic() + PRUNE_INTERVAL
+                    self._prune_changes()
+            except Exception as e:
+                print(f"Error reading changes: {e}")
+
+    # --- QUERIES (served from the indexes) ---
+
+    def get_task(self, task_id):
+        t = self.rows.get(task_id)
+        if t is None:
+            found = self._select("id = ?", (task_id,), order="id")
+            t = found[0] if found else None
+        return t
+
+    def _searched(self, query, where, params, order):
+        """_select narrowed to titles matching 'query' through the search index."""
+        with self.lock:
+            ids = self.search.match(query)
+        if ids is None:
+            return self._select(where, params, order)
+        if len(ids) > SEARCH_IN_LIMIT:
+            return [t for t in self._select(where, params, order) if t.id in ids]
+        ids = list(ids)
+        return self._select(f"({where}) AND id IN ({', '.join('?' * len(ids))})", [*params, *ids], order)
+
+    def active_tasks(self, category="All", priority="All", query=""):
+        # While the user types, results are filtered out of an earlier one (search.ResultCache)
+        with self.lock:
+            key = (self.version, category, priority)
+            rows = self.results.lookup(key, query, self.search.match)
+            if rows is None:
+                rows = self._active(category, priority, query)
+            self.results.store(key, query, rows)
+        return rows
+
+    def _active(self, category, priority, query):
+        where, params = "status = ?", []
+        if category != "All":
+            where += " AND category = ?"
+            params.append(category)
+        if priority != "All":
+            where += " AND priority = ?"
+            params.append(priority)
+        # Two index range scans instead of sorting on (status == Completed, datetime)
+        return (self._searched(query, where, ["Pending", *params], "datetime") +
+                self._searched(query, where, ["Completed", *params], "datetime"))
+
+    def history_tasks(self, query=""):
+        with self.lock:
+            key = (self.version,)
+            rows = self.history.lookup(key, query, self.search.match)
+            if rows is None:
+                rows = self._searched(query, "status IN ('Completed', 'Deleted')", [], "datetime DESC")
+            self.history.store(key, query, rows)
+        return rows
+
+    def finished_before(self, cutoff):
+        return [t for t in self._select("status IN ('Completed', 'Deleted') AND datetime < ?", (format_dt(cutoff),))
+                if t.due is not None]
+
+    def pending_tasks(self):
+        return self._select("status = 'Pending'")
+
+    def export_query(self, statuses=None, categories=None, start=None, end=None):
+        """Returns (count, iterator of saved-form dicts); the iterator reads on its own connection."""
+        where, params = ["1"], []
+        for column, values in (("status", statuses), ("category", categories)):
+            if values is not None:
+                where.append(f"{column} IN ({', '.join('?' * len(values))})")
+                params.extend(values)
+        if start is not None:
+            where.append("datetime >= ?")
+            params.append(format_dt(start))
+        if end is not None:
+            where.append("datetime < ?")
+            params.append(format_dt(end))
+        where = " AND ".join(where)
+        with self.lock:
+            total = self.conn.execute(f"SELECT COUNT(*) FROM tasks WHERE {where}", params).fetchone()[0]
+
+        def rows():
+            # Consumers may advance this from different threads (e.g. the HTTP server's workers)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            try:
+                for r in conn.execute(f"SELECT {', '.join(COLUMNS)} FROM tasks WHERE {where} ORDER BY rowid", params):
+                    yield dict(zip(COLUMNS, r))
+            finally:
+                conn.close()
+        return total, rows()
@@ -0,0 +1,124 @@
+from datetime import date, timedelta
+
+from recurrence import anchor
+
+# Counters kept per day; a day's bucket is a list indexed by these
+CREATED, COMPLETED, ON_TIME, OVERDUE, SNOOZED, DELETED = range(6)
+BUCKET_SIZE = 6
+
+def day_key(dt):
+    return dt.strftime("%Y-%m-%d")
+
+def count_completion(user_stats, record):
+    """Adds a "complete" event (see Aggregates.event) to the user stats: the
+    total and the streak of active days. Replaying the same events in any
+    order gives the same counts, so processes sharing a store agree."""
+    if record["event"] != "complete":
+        return
+    user_stats["total_completed"] += 1
+    if user_stats.get("last_active_date") != record["day"]:
+        user_stats["streak"] += 1
+        user_stats["last_active_date"] = record["day"]
+
+class Aggregates:
+    """Rolling statistics, updated one event at a time instead of rescanning tasks.
+
+    days:       "YYYY-MM-DD" -> [created, completed, on time, overdue, snoozed, deleted]
+    categories: category -> [completed, on time, overdue]
+    priorities: priority -> [completions with a known start, total seconds to complete]
+
+    Events are plain dicts (see event()) so the stores can journal them and
+    replay them with apply(). Reports only walk the buckets they show.
+    """
+
+    def __init__(self, data=None):
+        data = data or {}
+        self.days = data.get("days", {})
+        self.categories = data.get("categories", {})
+        self.priorities = data.get("priorities", {})
+
+    def to_dict(self):
+        return {"days": self.days, "categories": self.categories, "priorities": self.priorities}
+
+    @staticmethod
+    def event(kind, t, now):
+        """Builds the record for a transition of task 't' ("add", "complete", "snooze" or "delete")."""
+        record = {"event": kind, "day": day_key(now), "category": t.category, "priority": t.priority}
+        if kind == "complete":
+            record["on_time"] = t.due is None or now <= t.due
+            # A series is created once; each occurrence starts when it comes due
+            start = anchor(t) if t.repeat else t.created
+            if start is not None:
+                record["seconds"] = max(0, round((now - start).total_seconds()))
+        return record
+
+    def _bucket(self, day):
+        b = self.days.get(day)
+        if b is None:
+            b = self.days[day] = [0] * BUCKET_SIZE
+        return b
+
+    def apply(self, record):
+        """Adds one event record to the counters."""
+        kind = record["event"]
+        bucket = self._bucket(record["day"])
+        if kind == "add":
+            bucket[CREATED] += 1
+        elif kind == "snooze":
+            bucket[SNOOZED] += 1
+        elif kind == "delete":
+            bucket[DELETED] += 1
+        elif kind == "complete":
+            bucket[COMPLETED] += 1
+            cat = self.categories.setdefault(record["category"], [0, 0, 0])
+            cat[0] += 1
+            if "on_time" in record:
+                bucket[ON_TIME if record["on_time"] else OVERDUE] += 1
+                cat[1 if record["on_time"] else 2] += 1
+            if "seconds" in record:
+                pri = self.priorities.setdefault(record["priority"], [0, 0.0])
+                pri[0] += 1
+                pri[1] += record["seconds"]
+
+    def backfill(self, tasks):
+        """Seeds the counters from existing completed tasks (counted on their due day;
+        whether they were on time isn't known). Used once for stores that predate stats."""
+        for t in tasks:
+            if t.status == "Completed" and t.due is not None:
+                self.apply({"event": "complete", "day": day_key(t.due), "category": t.category, "priority": t.priority})
+
+    # --- REPORTS ---
+
+    def daily(self, n, today=None):
+        """[(date, bucket)] for the last n days, oldest first."""
+        today = today or date.today()
+        empty = [0] * BUCKET_SIZE
+        out = []
+        for i in range(n - 1, -1, -1):
+            d = today - timedelta(days=i)
+            out.append((d, self.days.get(day_key(d), empty)))
+        return out
+
+    def weekly(self, n, today=None):
+        """[(monday, completions)] for the last n weeks, oldest first."""
+        today = today or date.today()
+        monday = today - timedelta(days=today.weekday())
+        empty = [0] * BUCKET_SIZE
+        out = []
+        for w in range(n - 1, -1, -1):
+            start = monday - timedelta(weeks=w)
+            days = (day_key(start + timedelta(days=i)) for i in range(7))
+            out.append((start, sum(self.days.get(d, empty)[COMPLETED] for d in days)))
+        return out
+
+    def totals(self):
+        """Sums of every counter over all days."""
+        out = [0] * BUCKET_SIZE
+        for b in self.days.values():
+            for i, n in enumerate(b):
+                out[i] += n
+        return out
+
+    def mean_completion(self):
+        """priority -> mean time from creation (or, for a series, the occurrence) to completion."""
+        return {p: timedelta(seconds=s / n) for p, (n, s) in self.priorities.items() if n}
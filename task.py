@@ -0,0 +1,113 @@
+import sys
+import uuid
+from datetime import datetime
+
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+def new_task_id():
+    return uuid.uuid4().hex
+
+def parse_dt(text):
+    """Parses a stored timestamp; None stays None."""
+    return datetime.strptime(text, DATE_FORMAT) if text else None
+
+def format_dt(dt):
+    return dt.strftime(DATE_FORMAT) if dt else None
+
+class Task:
+    """One to-do item.
+
+    Timestamps are parsed once when the task is loaded or changed; the stored
+    text of the due date is kept until it changes so saving doesn't reformat it.
+    Category, priority and status are interned since there are only a handful.
+    A repeating task (a series) keeps its rule text in 'repeat' and its current
+    occurrence in 'due'; when that occurrence is snoozed, 'slot' keeps the time
+    it was scheduled for, which later occurrences follow. See recurrence.py.
+    """
+    __slots__ = ("id", "task", "category", "priority", "status", "due", "last_reminded", "repeat", "created", "slot", "_due_text", "__weakref__")
+
+    def __init__(self, task, category, priority, due, status="Pending", last_reminded=None, id=None, repeat=None, created=None, slot=None):
+        self.id = id or new_task_id()
+        self.task = task
+        self.category = sys.intern(category)
+        self.priority = sys.intern(priority)
+        self.status = sys.intern(status)
+        self.due = due
+        self.last_reminded = last_reminded
+        self.repeat = repeat
+        self.created = created
+        self.slot = slot
+        self._due_text = None
+
+    @classmethod
+    def from_dict(cls, d):
+        """Builds a task from its saved form (JSON snapshot, journal or database row)."""
+        t = cls(d['task'], d['category'], d['priority'], None, d['status'], id=d.get('id'))
+        t._set_saved(d)
+        return t
+
+    def _set_saved(self, d):
+        """Applies saved fields (keys as in to_dict) to the task."""
+        for key, value in d.items():
+            if key == 'datetime':
+                try:
+                    self.due = parse_dt(value)
+                except ValueError:
+                    self.due = None # Broken date; keep the text so it is shown and saved as-is
+                self._due_text = value
+            elif key in ('last_reminded', 'created', 'slot'):
+                try:
+                    setattr(self, key, parse_dt(value))
+                except ValueError:
+                    setattr(self, key, None)
+            elif key in ('category', 'priority', 'status'):
+                setattr(self, key, sys.intern(value))
+            elif key in ('id', 'task', 'repeat'):
+                setattr(self, key, value)
+
+    def update(self, **fields):
+        """Sets attributes (due and last_reminded as datetimes)."""
+        for key, value in fields.items():
+            if key in ('category', 'priority', 'status'):
+                value = sys.intern(value)
+            elif key == 'due':
+                self._due_text = None
+            setattr(self, key, value)
+
+    @staticmethod
+    def saved_fields(fields):
+        """Converts update() keyword arguments to their saved form."""
+        out = {}
+        for key, value in fields.items():
+            if key == 'due':
+                out['datetime'] = format_dt(value)
+            elif key in ('last_reminded', 'created', 'slot'):
+                out[key] = format_dt(value)
+            else:
+                out[key] = value
+        return out
+
+    @property
+    def due_str(self):
+        if self._due_text is None:
+            self._due_text = format_dt(self.due)
+        return self._due_text
+
+    @property
+    def sort_key(self):
+        """Due date for sorting; tasks with a broken date go last."""
+        return self.due or datetime.max
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "task": self.task,
+            "category": self.category,
+            "priority": self.priority,
+            "datetime": self.due_str,
+            "status": self.status,
+            "last_reminded": format_dt(self.last_reminded),
+            "repeat": self.repeat,
+            "created": format_dt(self.created),
+            "slot": format_dt(self.slot),
+        }
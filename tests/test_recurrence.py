@@ -0,0 +1,96 @@
+"""Repeat rules, and snoozing one occurrence of a series.
+
+    python -m pytest tests
+"""
+import os
+import sys
+from datetime import datetime
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import actions
+import database
+import sqlite_store
+from recurrence import complete_fields, next_occurrence, occurrences, parse_rule, rollover_fields
+from task import Task
+
+MONDAY = datetime(2026, 1, 5, 9, 0)
+
+def test_rule_steps_by_interval():
+    rule = parse_rule("every 2 days")
+    assert rule.next_after(MONDAY, MONDAY) == datetime(2026, 1, 7, 9, 0)
+    assert rule.next_after(MONDAY, datetime(2026, 1, 10, 12, 0)) == datetime(2026, 1, 11, 9, 0)
+    assert rule.next_after(MONDAY, datetime(2026, 1, 1)) == MONDAY
+    assert rule.latest(MONDAY, datetime(2026, 1, 10, 12, 0)) == datetime(2026, 1, 9, 9, 0)
+    assert rule.latest(MONDAY, datetime(2026, 1, 1)) == MONDAY
+
+def test_rule_byday_skips_other_days():
+    rule = parse_rule("weekdays")
+    friday = datetime(2026, 1, 9, 9, 0)
+    assert rule.next_after(MONDAY, friday) == datetime(2026, 1, 12, 9, 0)
+    assert rule.latest(MONDAY, datetime(2026, 1, 11, 20, 0)) == friday
+
+def test_rule_until_ends_the_series():
+    rule = parse_rule("FREQ=DAILY;UNTIL=20260106")
+    assert rule.next_after(MONDAY, MONDAY) == datetime(2026, 1, 6, 9, 0)
+    assert rule.next_after(MONDAY, datetime(2026, 1, 6, 9, 0)) is None
+    assert rule.latest(MONDAY, datetime(2026, 2, 1)) == datetime(2026, 1, 6, 9, 0)
+
+def test_rule_text_round_trips():
+    for text in ("FREQ=HOURLY;INTERVAL=4", "FREQ=WEEKLY;BYDAY=MO,WE", "FREQ=DAILY;UNTIL=20260301T120000"):
+        assert parse_rule(text).text == text
+    assert parse_rule("weekdays").describe() == "Weekdays"
+
+@pytest.mark.parametrize("text", ["FREQ=YEARLY", "FREQ=DAILY;INTERVAL=0", "FREQ=HOURLY;BYDAY=MO", "FREQ=DAILY;COUNT=3", "sometimes"])
+def test_rule_rejects_unsupported(text):
+    with pytest.raises(ValueError):
+        parse_rule(text)
+
+def test_series_helpers_follow_the_snoozed_slot():
+    t = Task("Standup", "Work", "Normal", datetime(2026, 1, 5, 9, 30), repeat="daily", slot=MONDAY)
+    assert next_occurrence(t) == datetime(2026, 1, 6, 9, 0)
+    assert [o.due for o in occurrences(t, datetime(2026, 1, 7, 23, 0))] == [datetime(2026, 1, 6, 9, 0), datetime(2026, 1, 7, 9, 0)]
+    assert complete_fields(t, datetime(2026, 1, 5, 9, 40)) == {"due": datetime(2026, 1, 6, 9, 0), "last_reminded": None, "slot": None}
+    assert rollover_fields(t, datetime(2026, 1, 5, 12, 0)) == {}
+    assert rollover_fields(t, datetime(2026, 1, 6, 9, 5)) == {"due": datetime(2026, 1, 6, 9, 0), "slot": None}
+
+@pytest.fixture
+def store(tmp_path, monkeypatch, request):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(database, "WATCH_INTERVAL", 3600)
+    monkeypatch.setattr(sqlite_store, "WATCH_INTERVAL", 3600)
+    make = database.TaskManager if request.param == "json" else sqlite_store.SQLiteTaskManager
+    stores = []
+    def open_store():
+        stores.append(make())
+        return stores[-1]
+    yield open_store
+    for db in stores:
+        db.close()
+
+@pytest.mark.parametrize("store", ["json", "sqlite"], indirect=True)
+def test_snoozing_an_occurrence_keeps_the_series_schedule(store):
+    db = store()
+    t = actions.add(db, Task("Standup", "Work", "Normal", MONDAY, repeat="daily"), MONDAY)
+    actions.snooze(db, t, 30, MONDAY)
+    actions.snooze(db, t, 30, MONDAY)
+    assert (t.due, t.slot) == (datetime(2026, 1, 5, 10, 0), MONDAY)
+    db.close()
+
+    db = store()
+    t = db.get_task(t.id)
+    assert (t.due, t.slot) == (datetime(2026, 1, 5, 10, 0), MONDAY)
+    actions.complete(db, t, datetime(2026, 1, 5, 10, 5))
+    assert (t.due, t.slot) == (datetime(2026, 1, 6, 9, 0), None)
+
+def test_snoozing_a_one_off_task_just_moves_it(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    db = database.TaskManager()
+    try:
+        t = actions.add(db, Task("Call", "Work", "Normal", MONDAY), MONDAY)
+        actions.snooze(db, t, 10, MONDAY)
+        assert (t.due, t.slot) == (datetime(2026, 1, 5, 9, 10), None)
+    finally:
+        db.close()
@@ -0,0 +1,253 @@
+"""Two store instances on one directory stand in for two processes sharing it.
+
+Writers get a long save delay so nothing reaches the disk before flush(),
+and the watcher threads are slowed down so only explicit sync() calls
+read the other side's changes.
+
+    python -m pytest tests
+"""
+import os
+import sqlite3
+import sys
+from datetime import datetime
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import actions
+import database
+import sqlite_store
+from api import Api
+from stats import COMPLETED
+from task import Task
+
+DUE = datetime(2030, 1, 1, 9, 0)
+
+@pytest.fixture(autouse=True)
+def store_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(database, "WATCH_INTERVAL", 3600)
+    monkeypatch.setattr(sqlite_store, "WATCH_INTERVAL", 3600)
+    return tmp_path
+
+@pytest.fixture
+def open_store():
+    """Opens stores like open_task_manager() would and closes them after the test."""
+    stores = []
+    def open_store(backend="json"):
+        if backend == "json":
+            db = database.TaskManager(save_delay=60)
+        else:
+            db = sqlite_store.SQLiteTaskManager()
+        stores.append(db)
+        return db
+    yield open_store
+    for db in stores:
+        db.close()
+
+def listen(db):
+    calls = []
+    db.subscribe(calls.append)
+    return calls
+
+def new_task(text="Write report"):
+    return Task(text, "Work", "Normal", DUE)
+
+# --- JSON journal ---
+
+def test_json_merges_adds_updates_and_removes(open_store):
+    a, b = open_store(), open_store()
+    calls = listen(b)
+    t1, t2 = a.add_task(new_task("one")), a.add_task(new_task("two"))
+    a.flush()
+    b.sync()
+    assert {t.id for t in calls[-1]} == {t1.id, t2.id}
+    assert b.get_task(t1.id).task == "one"
+
+    a.update_task(t1, priority="High")
+    a.remove_tasks([t2])
+    a.flush()
+    b.sync()
+    assert b.get_task(t1.id).priority == "High"
+    assert b.get_task(t2.id) is None
+    assert b.active_tasks(query="one") == [b.get_task(t1.id)]
+
+def test_json_active_list_stays_sorted_across_changes(open_store):
+    db = open_store()
+    tasks = db.bulk_add([Task(f"task {i}", "Work", "Normal", DUE.replace(minute=i)) for i in range(40)])
+    db.search.build_async()
+    db.active_tasks()
+    db.update_task(tasks[3], due=DUE.replace(day=5))
+    db.update_task(tasks[20], status="Completed")
+    db.update_task(tasks[7], task="moved")
+    db.remove_tasks([tasks[0]])
+    early = db.add_task(Task("task early", "Work", "Normal", DUE.replace(hour=8)))
+
+    expected = sorted(tasks[1:] + [early], key=lambda t: (t.status == "Completed", t.due))
+    assert db.active_tasks() == expected
+    assert db.active_tasks(query="task") == [t for t in expected if t is not tasks[7]]
+    assert db.active_tasks(query="mov") == [tasks[7]]
+
+def test_json_unwritten_local_field_wins(open_store):
+    a, b = open_store(), open_store()
+    t = a.add_task(new_task())
+    a.flush()
+    b.sync()
+    a.update_task(t, priority="High", category="Study")
+    a.flush()
+    b.update_task(b.get_task(t.id), priority="Low") # Not written yet
+    b.sync()
+    mine = b.get_task(t.id)
+    assert (mine.priority, mine.category) == ("Low", "Study")
+
+    b.flush()
+    a.sync()
+    assert (t.priority, t.category) == ("Low", "Study")
+
+def test_json_catches_up_across_compaction(open_store, monkeypatch):
+    monkeypatch.setattr(database, "COMPACT_EVERY", 20)
+    monkeypatch.setattr(database, "KEEP_RECORDS", 10)
+    a, b = open_store(), open_store()
+    calls = listen(b)
+    t = a.add_task(new_task())
+    a.flush()
+    b.sync()
+
+    # A little behind: the records kept after the compaction are enough
+    for i in range(25):
+        a.update_task(t, task=f"edit {i}")
+        a.flush()
+        if i == 15:
+            b.sync()
+    b.sync()
+    assert calls[-1] is not None
+    assert b.get_task(t.id).task == "edit 24"
+
+    # Too far behind: everything is reloaded
+    for i in range(45):
+        a.update_task(t, task=f"again {i}")
+        a.flush()
+    b.sync()
+    assert calls[-1] is None
+    assert b.get_task(t.id).task == "again 44"
+
+def test_json_rebase_reloads_other_process(open_store, monkeypatch):
+    monkeypatch.setattr(database, "COMPACT_EVERY", 20)
+    a, b = open_store(), open_store()
+    calls = listen(b)
+    added = a.bulk_add([new_task(f"bulk {i}") for i in range(30)])
+    a.flush()
+    b.sync()
+    assert calls[-1] is None
+    assert {t.id for t in b.tasks} == {t.id for t in added}
+
+def test_json_torn_record_is_cut_off(open_store, store_dir):
+    a, b = open_store(), open_store()
+    t = a.add_task(new_task())
+    a.flush()
+    with open(store_dir / database.JOURNAL_FILE, "ab") as f:
+        f.write(b'{"op": "set", "seq": 99, "id": "') # A writer that crashed mid-record
+    b.sync()
+    assert b.get_task(t.id) is not None
+    assert (store_dir / database.JOURNAL_FILE).read_bytes().endswith(b"\n")
+
+    a.update_task(t, priority="High")
+    a.flush()
+    b.sync()
+    assert b.get_task(t.id).priority == "High"
+    assert open_store().get_task(t.id).priority == "High"
+
+# --- SQLite ---
+
+def test_sqlite_refreshes_rows_changed_elsewhere(open_store):
+    a, b = open_store("sqlite"), open_store("sqlite")
+    calls = listen(b)
+    t = a.add_task(new_task())
+    b.sync()
+    mine = b.get_task(t.id)
+    assert calls[-1] == [mine]
+
+    a.update_task(t, priority="High")
+    b.sync()
+    assert mine.priority == "High" # The object b handed out is updated in place
+    a.remove_tasks([t])
+    b.sync()
+    assert b.get_task(t.id) is None
+
+def test_sqlite_reader_too_far_behind_reloads(open_store, monkeypatch):
+    monkeypatch.setattr(sqlite_store, "CHANGES_KEEP", 5)
+    a, b = open_store("sqlite"), open_store("sqlite")
+    calls = listen(b)
+    t = a.add_task(new_task())
+    b.sync()
+    for i in range(20):
+        a.update_task(t, task=f"edit {i}")
+    a._prune_changes()
+    b.sync()
+    assert calls[-1] is None
+    assert b.get_task(t.id).task == "edit 19"
+
+def test_sqlite_change_log_is_trimmed_without_readers(open_store, monkeypatch):
+    monkeypatch.setattr(sqlite_store, "CHANGES_KEEP", 10)
+    a = open_store("sqlite")
+    t = a.add_task(new_task())
+    for i in range(30):
+        a.update_task(t, task=f"edit {i}")
+    a.close()
+    b = open_store("sqlite")
+    assert b.conn.execute("SELECT COUNT(*) FROM changes").fetchone()[0] <= 10
+
+def test_sqlite_bulk_add_skips_repeated_ids(open_store):
+    db = open_store("sqlite")
+    rows = [Task("one", "Work", "Normal", DUE, id="abc"), Task("two", "Work", "Normal", DUE, id="abc")]
+    assert [t.task for t in db.bulk_add(rows)] == ["one"]
+    assert not db.conn.in_transaction
+
+    t = db.add_task(new_task("after"))
+    db.close()
+    again = open_store("sqlite")
+    assert {x.task for x in again.tasks} == {"one", "after"}
+    assert again.get_task(t.id) is not None
+
+def test_sqlite_failed_write_is_rolled_back(open_store):
+    db = open_store("sqlite")
+    t = db.add_task(new_task())
+    with pytest.raises(sqlite3.IntegrityError):
+        with db._atomic():
+            db.conn.execute("DELETE FROM tasks")
+            db.conn.execute("INSERT INTO tasks (id, task) VALUES (NULL, NULL)")
+    assert not db.conn.in_transaction
+    assert db.conn.execute("SELECT id FROM tasks").fetchall() == [(t.id,)]
+
+# --- Both ---
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_completions_from_two_processes_add_up(open_store, backend):
+    a, b = open_store(backend), open_store(backend)
+    now = datetime.now()
+    t1, t2 = actions.add(a, new_task("one"), now), actions.add(a, new_task("two"), now)
+    a.flush()
+    b.sync()
+    actions.complete(a, t1, now)
+    actions.complete(b, b.get_task(t2.id), now)
+    a.flush()
+    b.flush()
+    a.sync()
+    b.sync()
+    for db in (a, b, open_store(backend)):
+        assert db.user_stats["total_completed"] == 2
+        assert db.user_stats["streak"] == 1
+        assert db.aggregates.totals()[COMPLETED] == 2
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_api_add_refuses_an_existing_id(open_store, backend):
+    db = open_store(backend)
+    api = Api(db)
+    first = api.add({"task": "one", "datetime": "2030-01-01 09:00"})
+    results = next(api.run_batch([{"op": "add", "id": first["task"]["id"], "task": "two", "datetime": "2030-01-01 10:00"},
+                                  {"op": "add", "task": "three", "datetime": "2030-01-01 11:00"}]))
+    assert [r["ok"] for r in results] == [False, True]
+    assert "already exists" in results[0]["error"]
+    assert sorted(t.task for t in db.tasks) == ["one", "three"]
+    assert db.get_task(first["task"]["id"]).task == "one"
@@ -0,0 +1,31 @@
+"""Event-driven statistics.
+
+    python -m pytest tests
+"""
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recurrence import complete_fields
+from stats import COMPLETED, Aggregates
+from task import Task
+
+START = datetime(2026, 1, 5, 9, 0)
+
+def test_one_off_time_to_complete_counts_from_creation():
+    agg = Aggregates()
+    t = Task("Report", "Work", "High", START + timedelta(days=2), created=START)
+    agg.apply(Aggregates.event("complete", t, START + timedelta(hours=3)))
+    assert agg.mean_completion() == {"High": timedelta(hours=3)}
+
+def test_series_time_to_complete_counts_from_each_occurrence():
+    agg = Aggregates()
+    t = Task("Standup", "Work", "Normal", START, repeat="daily", created=START - timedelta(days=30))
+    for _ in range(200):
+        now = t.due + timedelta(minutes=1)
+        agg.apply(Aggregates.event("complete", t, now))
+        t.update(**complete_fields(t, now))
+    assert agg.totals()[COMPLETED] == 200
+    assert agg.mean_completion() == {"Normal": timedelta(minutes=1)}
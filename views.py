@@ -0,0 +1,212 @@
+from datetime import datetime
+
+FULL_REDRAW_RATIO = 0.5  # Above this share of moved/inserted rows a plain redraw is cheaper
+OVERSCAN = 10            # Extra rows kept below the viewport of the virtual list
+
+def task_row(t, now):
+    """Returns the (iid, values, tags) the task list shows for a task."""
+    tag = t.priority
+    if t.status == "Completed": tag = "Completed"
+    elif t.status == "Upcoming": tag = "Upcoming"
+    elif t.due is not None and now > t.due: tag = "Overdue"
+    text = "↻ " + t.task if t.repeat else t.task
+    return t.id, (t.priority, text, t.category, t.due_str, t.status), (tag,)
+
+def stable_keys(keys, pos):
+    """Returns the longest run of keys (in order) whose old positions are increasing.
+
+    Those rows can stay where they are; everything else has to move.
+    """
+    tails, tail_idx, prev = [], [], [None] * len(keys)
+    for i, k in enumerate(keys):
+        p = pos[k]
+        lo, hi = 0, len(tails)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if tails[mid] < p: lo = mid + 1
+            else: hi = mid
+        if lo == len(tails):
+            tails.append(p)
+            tail_idx.append(i)
+        else:
+            tails[lo] = p
+            tail_idx[lo] = i
+        prev[i] = tail_idx[lo - 1] if lo else None
+
+    keep = set()
+    i = tail_idx[-1] if tail_idx else None
+    while i is not None:
+        keep.add(keys[i])
+        i = prev[i]
+    return keep
+
+class SlotCounter:
+    """Fenwick tree over n slots: marks slots filled or empty and counts the filled
+    ones before a slot, both in O(log n). 'filled' lists the slots filled at first."""
+
+    def __init__(self, n, filled=()):
+        self.tree = [0] * (n + 1)
+        for slot in filled:
+            self.tree[slot + 1] = 1
+        for i in range(1, n + 1):
+            parent = i + (i & -i)
+            if parent <= n:
+                self.tree[parent] += self.tree[i]
+
+    def add(self, slot, delta):
+        i = slot + 1
+        while i < len(self.tree):
+            self.tree[i] += delta
+            i += i & -i
+
+    def before(self, slot):
+        total, i = 0, slot
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+def diff_rows(old_order, old_rows, new_rows):
+    """Computes the Treeview operations turning the old rows into new_rows.
+
+    old_order is the current list of iids, old_rows maps iid -> (values, tags)
+    and new_rows is the wanted list of (iid, values, tags). Returns a list of
+    ("delete", iids), ("insert", index, iid, values, tags), ("move", iid, index),
+    ("update", iid, values, tags) or a single ("reset", new_rows).
+    """
+    new_ids = [r[0] for r in new_rows]
+    new_set = set(new_ids)
+    ops = []
+
+    deleted = [iid for iid in old_order if iid not in new_set]
+    current = [iid for iid in old_order if iid in new_set]
+    pos = {iid: i for i, iid in enumerate(current)}
+    stable = stable_keys([iid for iid in new_ids if iid in pos], pos)
+
+    if len(new_ids) - len(stable) > FULL_REDRAW_RATIO * max(len(new_ids), 1) and len(new_ids) > 64:
+        return [("reset", new_rows)]
+    if deleted:
+        ops.append(("delete", deleted))
+
+    # Every moved or inserted row goes right after the previous new row, i.e. into a
+    # chain behind the last stable row before it. Laying out all slots up front (old
+    # places, each followed by its chain) turns each Treeview index into a count of
+    # the filled slots before it, instead of searching and shifting a list per row.
+    chains, anchor = {}, -1
+    for iid in new_ids:
+        if iid in stable:
+            anchor = pos[iid]
+        else:
+            chains.setdefault(anchor, []).append(iid)
+    old_slots, slots = [], {}
+    for p in range(-1, len(current)):
+        if p >= 0:
+            old_slots.append(len(old_slots) + len(slots))
+        for iid in chains.get(p, ()):
+            slots[iid] = len(old_slots) + len(slots)
+    filled = SlotCounter(len(old_slots) + len(slots), old_slots)
+
+    for iid, values, tags in new_rows:
+        if iid not in stable:
+            if iid in pos:
+                filled.add(old_slots[pos[iid]], -1)
+            index = filled.before(slots[iid])
+            filled.add(slots[iid], 1)
+            if iid not in pos:
+                ops.append(("insert", index, iid, values, tags))
+                continue
+            ops.append(("move", iid, index))
+        if old_rows[iid] != (values, tags):
+            ops.append(("update", iid, values, tags))
+    return ops
+
+class TreeviewSync:
+    """Keeps a flat ttk.Treeview in step with a list of rows keyed by iid."""
+
+    def __init__(self, tree):
+        self.tree = tree
+        self.order = []
+        self.rows = {}
+
+    def show(self, tasks):
+        """Shows every task in order."""
+        now = datetime.now()
+        self.sync([task_row(t, now) for t in tasks])
+
+    def sync(self, new_rows):
+        """Applies only the inserts, moves, updates and deletes needed to show new_rows."""
+        tree = self.tree
+        for op in diff_rows(self.order, self.rows, new_rows):
+            kind = op[0]
+            if kind == "delete":
+                tree.delete(*op[1])
+            elif kind == "insert":
+                tree.insert("", op[1], iid=op[2], values=op[3], tags=op[4])
+            elif kind == "move":
+                tree.move(op[1], "", op[2])
+            elif kind == "update":
+                tree.item(op[1], values=op[2], tags=op[3])
+            elif kind == "reset":
+                tree.delete(*tree.get_children())
+                for iid, values, tags in new_rows:
+                    tree.insert("", "end", iid=iid, values=values, tags=tags)
+        self.order = [r[0] for r in new_rows]
+        self.rows = {iid: (values, tags) for iid, values, tags in new_rows}
+
+class VirtualTaskList:
+    """Shows a window of a long task sequence in a Treeview that never holds more
+    than the visible rows plus OVERSCAN, and drives the scrollbar itself.
+    """
+
+    def __init__(self, tree, scrollbar, row_height=28):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.row_height = row_height
+        self.rows = TreeviewSync(tree)
+        self.items = []
+        self.offset = 0
+        self.visible = 20
+
+        scrollbar.configure(command=self.yview)
+        tree.bind("<Configure>", self.on_resize)
+        tree.bind("<MouseWheel>", lambda e: self.yview("scroll", -1 if e.delta > 0 else 1, "units"))
+        tree.bind("<Button-4>", lambda e: self.yview("scroll", -1, "units"))
+        tree.bind("<Button-5>", lambda e: self.yview("scroll", 1, "units"))
+        tree.bind("<Prior>", lambda e: self.yview("scroll", -1, "pages"))
+        tree.bind("<Next>", lambda e: self.yview("scroll", 1, "pages"))
+
+    def show(self, tasks):
+        """Replaces the sequence being shown and keeps the scroll position."""
+        self.items = tasks
+        self.render()
+
+    def render(self):
+        self.offset = max(0, min(self.offset, len(self.items) - self.visible))
+        window = self.items[self.offset:self.offset + self.visible + OVERSCAN]
+        now = datetime.now()
+        self.rows.sync([task_row(t, now) for t in window])
+
+        total = len(self.items)
+        if total:
+            self.scrollbar.set(self.offset / total, min(1.0, (self.offset + self.visible) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+        # The Treeview itself never scrolls; it always starts at the first row
+        self.tree.yview_moveto(0)
+
+    def yview(self, *args):
+        """Scrollbar/mouse wheel command: 'moveto fraction' or 'scroll n units|pages'."""
+        if args[0] == "moveto":
+            self.offset = int(float(args[1]) * len(self.items))
+        elif args[0] == "scroll":
+            step = self.visible if args[2] == "pages" else 1
+            self.offset += int(args[1]) * step
+        self.render()
+        return "break"
+
+    def on_resize(self, event):
+        # One row's worth of height goes to the heading
+        visible = max(1, event.height // self.row_height - 1)
+        if visible != self.visible:
+            self.visible = visible
+            self.render()